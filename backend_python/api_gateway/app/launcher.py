@@ -0,0 +1,191 @@
+# Production launcher: N uvicorn workers on a shared (pre-fork) or SO_REUSEPORT socket, with graceful drain
+import argparse
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+import uvicorn
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger, shutdown_logging
+
+logger = setup_logger("api_gateway_launcher")
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    """Listening socket; with reuse_port every worker binds its own and the kernel spreads connections"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def serve(app, sock: socket.socket):
+    """Run one uvicorn server on a bound socket; SIGTERM stops accepting and drains in-flight requests"""
+    config = uvicorn.Config(
+        app,
+        log_level="warning",
+        access_log=False,
+        timeout_graceful_shutdown=settings.GATEWAY_DRAIN_TIMEOUT,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+class Supervisor:
+    """Forks the shared state server and the workers, restarts crashed workers and drains on SIGTERM"""
+
+    def __init__(self, app, startup: dict, workers: int, host: str, port: int, reuse_port: bool):
+        self.app = app
+        self.startup = startup
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.reuse_port = reuse_port
+        self.sock = None
+        self.worker_pids = {}
+        self.state_pid = None
+        # One socket path for the life of the supervisor, so workers reconnect to a restarted server
+        self.state_dir = tempfile.mkdtemp(prefix="gateway-")
+        self.state_path = os.path.join(self.state_dir, "state.sock")
+        self.stopping = False
+
+    def _fork(self, target) -> int:
+        pid = os.fork()
+        if pid:
+            return pid
+        # Child: default signal handling, run the target and never return into the supervisor loop
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            target()
+        except KeyboardInterrupt:
+            pass
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException as e:
+            logger.error("Process %s failed: %s", os.getpid(), e)
+            code = 1
+        finally:
+            shutdown_logging()
+            os._exit(code)
+
+    def _worker(self):
+        self.startup["started"] = self.startup["imported"] = time.perf_counter()
+        sock = self.sock if self.sock is not None else bind_socket(self.host, self.port, True)
+        serve(self.app, sock)
+
+    def spawn_worker(self, index: int):
+        pid = self._fork(self._worker)
+        self.worker_pids[pid] = (index, time.monotonic())
+
+    def start_shared_state(self) -> str:
+        from backend_python.api_gateway.app.services.sharedState import SharedStateServer, shared_state
+        path = self.state_path
+        settings.SHARED_STATE_SOCKET = shared_state.path = path
+        # A killed server leaves its socket file behind; wait for the new one, not the stale one
+        if os.path.exists(path):
+            os.unlink(path)
+        self.state_pid = self._fork(SharedStateServer(path, settings.RATE_LIMIT_MAX_KEYS).run)
+        deadline = time.monotonic() + 5
+        while not os.path.exists(path):
+            if time.monotonic() > deadline:
+                raise RuntimeError("Shared state server did not start")
+            time.sleep(0.01)
+        return path
+
+    def _request_stop(self, signum, frame):
+        self.stopping = True
+
+    def run(self) -> int:
+        from backend_python.api_gateway.app.services.upstreamPool import tls_context
+        # Built once here, so forked workers inherit it instead of each loading the CA bundle
+        tls_context()
+        path = self.start_shared_state()
+        if not self.reuse_port:
+            self.sock = bind_socket(self.host, self.port, False)
+        for index in range(self.workers):
+            self.spawn_worker(index)
+        logger.info(
+            "API Gateway on %s:%s - %s workers (%s), shared state at %s",
+            self.host, self.port, self.workers, "SO_REUSEPORT" if self.reuse_port else "pre-fork", path,
+        )
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        while not self.stopping:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                time.sleep(0.2)
+                continue
+            if pid == self.state_pid:
+                logger.error("Shared state server exited (status %s); restarting it", status)
+                path = self.start_shared_state()
+            elif pid in self.worker_pids:
+                index, started = self.worker_pids.pop(pid)
+                logger.error("Worker %s (pid %s) exited with status %s; restarting it", index, pid, status)
+                # Back off when a worker dies right after starting, instead of fork-looping
+                if time.monotonic() - started < 1:
+                    time.sleep(1)
+                self.spawn_worker(index)
+        return self.drain()
+
+    def drain(self) -> int:
+        """SIGTERM the workers, wait for them to finish in-flight requests, then stop the shared state server"""
+        logger.info("Draining %s workers (up to %ss)", len(self.worker_pids), settings.GATEWAY_DRAIN_TIMEOUT)
+        for pid in self.worker_pids:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + settings.GATEWAY_DRAIN_TIMEOUT + 5
+        while self.worker_pids and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid == self.state_pid:
+                # Already gone, e.g. Ctrl-C signals the whole process group
+                self.state_pid = None
+            elif pid:
+                self.worker_pids.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for pid in self.worker_pids:
+            logger.warning("Worker pid %s did not drain in time; killing it", pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        if self.state_pid:
+            os.kill(self.state_pid, signal.SIGTERM)
+            os.waitpid(self.state_pid, 0)
+        if self.sock is not None:
+            self.sock.close()
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+        logger.info("API Gateway stopped")
+        return 0
+
+def run(app=None, startup: dict = None, workers: int = None, host: str = None, port: int = None, reuse_port: bool = None) -> int:
+    """Serve the gateway; more than one worker runs under the Supervisor"""
+    workers = settings.GATEWAY_WORKERS if workers is None else workers
+    workers = workers if workers > 0 else os.cpu_count() or 1
+    host = host or settings.GATEWAY_HOST
+    port = port or settings.GATEWAY_PORT
+    reuse_port = settings.GATEWAY_REUSE_PORT if reuse_port is None else reuse_port
+
+    # The app is imported once here, so forked workers start with every module already loaded
+    if app is None:
+        from backend_python.api_gateway.app.main import app, startup
+    logger.info("Gateway modules imported in %.0f ms", (startup["imported"] - startup["started"]) * 1000)
+    if workers == 1:
+        logger.info("Starting API Gateway on %s:%s", host, port)
+        serve(app, bind_socket(host, port, False))
+        return 0
+    if reuse_port and not hasattr(socket, "SO_REUSEPORT"):
+        logger.warning("SO_REUSEPORT is not supported here; using a pre-forked shared socket")
+        reuse_port = False
+    return Supervisor(app, startup, workers, host, port, reuse_port).run()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API gateway")
+    parser.add_argument("--workers", type=int, help="worker processes (0 = one per CPU); default GATEWAY_WORKERS")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--reuse-port", action="store_true", default=None, help="one SO_REUSEPORT socket per worker")
+    args = parser.parse_args()
+    raise SystemExit(run(workers=args.workers, host=args.host, port=args.port, reuse_port=args.reuse_port))
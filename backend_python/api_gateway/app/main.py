@@ -1,14 +1,78 @@
 # API Gateway main application
-from fastapi import FastAPI, HTTPException
+import time
+# Startup timing: module imports dominate a cold start, so they are reported separately
+startup = {"started": time.perf_counter()}
+
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Response
+from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from backend_python.api_gateway.app.routes.gateway import router as gateway_router
-from backend_python.shared.auth import create_access_token
+from backend_python.api_gateway.app.routes.gateway import router as gateway_router, sensor_simulator, prediction_batcher
+from backend_python.api_gateway.app.services.upstreamPool import upstream_pool
+from backend_python.api_gateway.app.services.healthProber import health_prober
+from backend_python.api_gateway.app.services.rateLimiter import rate_limiter
+from backend_python.api_gateway.app.services.admissionControl import loop_lag_monitor, admission_controller
+from backend_python.api_gateway.app.services.metrics import registry
+from backend_python.api_gateway.app.services.sensorIngest import sensor_ingestor
+from backend_python.api_gateway.app.services.sharedState import shared_state, SharedBucketBackend
+from backend_python.api_gateway.app.services.circuitBreaker import upstream_guard
+from backend_python.api_gateway.app.middleware.auth import security
+from backend_python.api_gateway.app.middleware.rateLimit import RateLimitMiddleware
+from backend_python.api_gateway.app.middleware.metrics import MetricsMiddleware
+from backend_python.shared.auth import create_access_token, revoke_token, add_revocation_listener, token_cache
+from backend_python.shared.config import settings
 from backend_python.shared.logger import setup_logger
+from backend_python.shared.requestContext import RequestContextMiddleware
 
-# Initialize FastAPI app and logger
-app = FastAPI(title="API Gateway", version="1.0.0")
 logger = setup_logger("api_gateway")
+startup["imported"] = time.perf_counter()
+
+async def start_shared_state():
+    """Share rate limits, token revocations and breaker trips with the other workers"""
+    await shared_state.start()
+    if rate_limiter.backend.name == "local":
+        rate_limiter.backend = SharedBucketBackend(shared_state)
+    shared_state.subscribe("revoked", lambda message: token_cache.revoke(*message))
+    add_revocation_listener(lambda key, expires_at: shared_state.publish("revoked", [key, expires_at]))
+    shared_state.subscribe("breaker", lambda message: upstream_guard.breakers[message[0]].trip(f"(tripped by another worker: {message[1]})"))
+    upstream_guard.add_listener(lambda service_name, reason: shared_state.publish("breaker", [service_name, reason]))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown"""
+    lifespan_started = time.perf_counter()
+    if shared_state.enabled:
+        await start_shared_state()
+    await upstream_pool.start()
+    loop_lag_monitor.start()
+    health_prober.start()
+    sensor_simulator.start()
+    await sensor_ingestor.start()
+    ready = time.perf_counter()
+    logger.info(
+        "API Gateway worker %s ready in %.0f ms (imports %.0f ms, startup %.0f ms)",
+        os.getpid(), (ready - startup["started"]) * 1000,
+        (startup["imported"] - startup["started"]) * 1000, (ready - lifespan_started) * 1000,
+    )
+    try:
+        yield
+    finally:
+        await sensor_ingestor.stop()
+        await sensor_simulator.stop()
+        await prediction_batcher.close()
+        await health_prober.stop()
+        await loop_lag_monitor.stop()
+        await rate_limiter.backend.close()
+        await shared_state.close()
+        await upstream_pool.close()
+
+# Initialize FastAPI app
+app = FastAPI(title="API Gateway", version="1.0.0", lifespan=lifespan)
+
+# Admission control and rate limiting (added before CORS so rejections still carry CORS headers)
+app.add_middleware(RateLimitMiddleware, enabled=settings.RATE_LIMIT_ENABLED)
 
 # Configure CORS middleware
 app.add_middleware(
@@ -19,6 +83,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latency, status and size metrics (outside rate limiting, so 429/503 rejections are counted too)
+app.add_middleware(MetricsMiddleware)
+
+# Request-ID correlation for logs and upstream calls (outermost, so every response carries the ID)
+app.add_middleware(RequestContextMiddleware)
+
 # Include gateway routes
 app.include_router(gateway_router, prefix="/api", tags=["gateway"])
 
@@ -33,12 +103,38 @@ async def login(request: LoginRequest):
     # Simple authentication logic (replace with real authentication)
     if request.username == "admin" and request.password == "password":
         token = create_access_token({"sub": request.username, "role": "admin"})
-        logger.info(f"User {request.username} logged in successfully")
+        logger.info("User %s logged in successfully", request.username)
         return {"access_token": token, "token_type": "bearer"}
     
-    logger.warning(f"Failed login attempt for user: {request.username}")
+    logger.warning("Failed login attempt for user: %s", request.username)
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
+@app.post("/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoke the presented JWT token (it must verify, like on protected routes)"""
+    if not credentials:
+        raise HTTPException(status_code=401, detail="Authorization header required")
+    revoke_token(credentials.credentials)
+    logger.info("Token revoked on logout")
+    return {"success": True}
+
+# Gauges read from component state at scrape time
+registry.gauge("gateway_event_loop_lag_current_seconds", "Most recent event-loop lag sample",
+               callback=lambda: {(): loop_lag_monitor.lag})
+registry.gauge("gateway_admission_in_flight", "Requests counted by admission control",
+               callback=lambda: {(): admission_controller.in_flight})
+registry.gauge("gateway_upstream_connections", "Upstream pool requests holding (in_use) or waiting for a connection", ("service", "state"),
+               callback=lambda: {
+                   (service, state): stats[state]
+                   for service, stats in upstream_pool.stats().items()
+                   for state in ("in_use", "waiting")
+               })
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of gateway metrics"""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring"""
@@ -46,6 +142,6 @@ async def health_check():
     return {"status": "healthy", "service": "api_gateway"}
 
 if __name__ == "__main__":
-    import uvicorn
-    logger.info("Starting API Gateway on port 8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # GATEWAY_WORKERS > 1 runs pre-forked workers with shared state (see launcher.py)
+    from backend_python.api_gateway.app.launcher import run
+    raise SystemExit(run(app, startup))
@@ -1,32 +1,35 @@
-from fastapi import Request, HTTPException, status
+from fastapi import Request, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from backend_python.shared.auth import verify_token
 from backend_python.shared.logger import setup_logger
 
 logger = setup_logger("api_gateway_auth")
-security = HTTPBearer()
+security = HTTPBearer(auto_error=False)
 
-async def authenticate_request(request: Request, credentials: HTTPAuthorizationCredentials = None):
+# Routes that never require a token
+PUBLIC_PATHS = frozenset(["/health", "/login", "/docs", "/redoc", "/openapi.json", "/api/health"])
+
+async def authenticate_request(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Middleware to authenticate all incoming requests"""
     # Skip authentication for health checks and login
-    if request.url.path in ["/health", "/login", "/docs", "/openapi.json", "/api*"]:
+    if request.url.path in PUBLIC_PATHS:
         return True
-    
-    return True
+
     # Check for authorization header
     if not credentials:
-        logger.warning(f"Missing authorization header for {request.url.path}")
+        logger.warning("Missing authorization header for %s", request.url.path)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header required"
+            detail="Authorization header required",
+            headers={"WWW-Authenticate": "Bearer"}
         )
-    
-    # Verify JWT token
+
+    # Verify JWT token (served from the verified-token cache after the first request)
     try:
         payload = verify_token(credentials.credentials)
         request.state.user = payload
-        logger.info(f"Authenticated user: {payload.get('sub')} for {request.url.path}")
+        logger.info("Authenticated user: %s for %s", payload.get('sub'), request.url.path)
         return True
     except Exception as e:
-        logger.error(f"Authentication failed: {str(e)}")
-        raise
\ No newline at end of file
+        logger.error("Authentication failed: %s", e)
+        raise
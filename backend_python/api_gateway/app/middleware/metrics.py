@@ -0,0 +1,63 @@
+# Per-route latency, status, in-flight and payload size metrics for every HTTP request
+import time
+from backend_python.api_gateway.app.services.metrics import (
+    http_requests, http_latency, http_in_flight, http_request_size, http_response_size
+)
+
+def route_label(scope) -> str:
+    """Route template (e.g. /api/sensors/{equipment_id}/data) so label cardinality stays bounded"""
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    # Routes of an included router may report their path without the router prefix; recover it from the URL
+    try:
+        rendered = path_format.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return getattr(route, "path", path_format)
+    path = scope["path"]
+    prefix = path[:len(path) - len(rendered)] if path.endswith(rendered) else ""
+    return prefix + getattr(route, "path", path_format)
+
+class MetricsMiddleware:
+    """Times each request until its last body chunk is sent and records status and sizes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        request_bytes = 0
+        response_bytes = 0
+
+        async def receive_counted():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_counted(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive_counted, send_counted)
+        finally:
+            http_in_flight.dec()
+            route = route_label(scope)
+            method = scope["method"]
+            http_latency.observe(time.perf_counter() - started, (route, method))
+            http_requests.inc((route, method, str(status)))
+            http_request_size.observe(request_bytes, (route,))
+            http_response_size.observe(response_bytes, (route,))
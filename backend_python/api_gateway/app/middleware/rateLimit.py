@@ -0,0 +1,64 @@
+# Admission control and rate limiting for every HTTP request, before routing and authentication
+from starlette.responses import JSONResponse
+from backend_python.shared.auth import verify_token
+from backend_python.shared.config import settings
+from backend_python.api_gateway.app.services.rateLimiter import rate_limiter
+from backend_python.api_gateway.app.services.admissionControl import admission_controller
+
+# Monitoring must keep answering under overload
+EXEMPT_PATHS = frozenset(["/health", "/api/health", "/metrics"])
+# Long-lived streams are rate limited on connect but not counted as in flight
+LONG_LIVED_PREFIXES = ("/api/stream/",)
+
+def client_ip(scope) -> str:
+    """Client address, from X-Forwarded-For only when the gateway sits behind a trusted proxy"""
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def request_user(scope):
+    """JWT subject of the request, or None; invalid tokens are left for authentication to reject"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return verify_token(token).get("sub")
+            except Exception:
+                return None
+    return None
+
+class RateLimitMiddleware:
+    """Sheds load with 503 when the gateway is saturated and answers 429 when a token bucket is empty"""
+
+    def __init__(self, app, limiter=rate_limiter, admission=admission_controller, enabled: bool = True):
+        self.app = app
+        self.limiter = limiter
+        self.admission = admission
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        counted = not path.startswith(LONG_LIVED_PREFIXES)
+        if counted and not self.admission.try_admit():
+            response = JSONResponse({"detail": "Server overloaded, retry shortly"}, status_code=503, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        try:
+            retry_after = await self.limiter.check(client_ip(scope), request_user(scope), path)
+            if retry_after:
+                response = JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers={"Retry-After": str(retry_after)})
+                await response(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+        finally:
+            if counted:
+                self.admission.release()
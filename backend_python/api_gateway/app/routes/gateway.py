@@ -1,45 +1,112 @@
 # API Gateway routing logic - Complete conversion from Express.js to FastAPI
-from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi import APIRouter, Request, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-import httpx
+from typing import List, Optional
+from pydantic import BaseModel
+import asyncio
 import os
+import time
+import anyio
+import httpx
+import numpy as np
 from backend_python.shared.config import settings
-from backend_python.shared.logger import setup_logger
+from backend_python.shared.auth import token_cache, verify_token, TokenCache
+from backend_python.shared.logger import setup_logger, log_stats
 from backend_python.api_gateway.app.middleware.auth import authenticate_request
-from backend_python.api_gateway.app.services.mockDataGenerator import MockDataGenerator
+from backend_python.api_gateway.app.services.mockDataGenerator import MockDataGenerator, SENSOR_THRESHOLDS
+from backend_python.api_gateway.app.services.alertEngine import AlertEngine
+from backend_python.api_gateway.app.services.upstreamPool import SERVICES, upstream_pool, failure_outcome
+from backend_python.api_gateway.app.services.healthProber import health_prober
+from backend_python.api_gateway.app.services.circuitBreaker import upstream_guard
+from backend_python.api_gateway.app.services.sensorStore import sensor_store, parse_duration
+from backend_python.api_gateway.app.services.sensorAggregation import (
+    SUPPORTED_AGGREGATIONS, aggregate_series, downsample_series
+)
+from backend_python.api_gateway.app.services.sensorSimulator import SensorSimulator
+from backend_python.api_gateway.app.services.telemetryHub import telemetry_hub, TOPICS
+from backend_python.api_gateway.app.services.fleetAggregates import fleet_aggregates
+from backend_python.api_gateway.app.services.equipmentRegistry import equipment_registry, INDEXED_FIELDS
+from backend_python.api_gateway.app.services.predictionBatcher import create_batcher
+from backend_python.api_gateway.app.services.sharedState import shared_state
+from backend_python.api_gateway.app.services.responseCache import response_cache, cached_response
+from backend_python.api_gateway.app.services.singleFlight import single_flight
+from backend_python.api_gateway.app.services.sensorIngest import (
+    sensor_ingestor, parse_ndjson, parse_frame, IngestError, QueueFullError
+)
+from backend_python.api_gateway.app.services.rateLimiter import rate_limiter
+from backend_python.api_gateway.app.services.admissionControl import admission_controller
+from backend_python.api_gateway.app.services.responseEncoding import (
+    negotiate_format, encode_response, epoch_ms, round_column
+)
 
 # Initialize router and logger
 router = APIRouter()
 logger = setup_logger("api_gateway")
 mock_data_generator = MockDataGenerator()
+alert_engine = AlertEngine(SENSOR_THRESHOLDS)
+alert_engine.add_listener(lambda equipment_id, alerts: telemetry_hub.publish("alerts", equipment_id, alerts))
+alert_engine.add_listener(fleet_aggregates.set_alerts)
+equipment_registry.add_listener(
+    lambda equipment_id, record: fleet_aggregates.set_status(equipment_id, record["status"])
+    if record is not None else fleet_aggregates.remove(equipment_id)
+)
+for equipment in mock_data_generator.get_equipment_list():
+    equipment_registry.upsert(equipment)
+prediction_batcher = create_batcher(mock_data_generator)
+sensor_simulator = SensorSimulator(mock_data_generator, sensor_store, alert_engine, telemetry_hub, fleet_aggregates)
 
-# Service endpoints configuration
-SERVICES = {
-    "SENSOR_SERVICE": os.getenv("SENSOR_SERVICE_URL", "http://localhost:8001"),
-    "AI_SERVICE": os.getenv("AI_SERVICE_URL", "http://localhost:8002"),
-    "NOTIFICATION_SERVICE": os.getenv("NOTIFICATION_SERVICE_URL", "http://localhost:8003"),
+# Connection-level headers that must not be forwarded by a proxy (RFC 7230 section 6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade",
 }
 
-async def proxy_request(request: Request, target_url: str, path_rewrite: dict = None):
-    """Generic function to proxy requests to microservices"""
+def rewrite_path(original_path: str, path_rewrite: dict = None) -> str:
+    """Apply the first matching prefix rewrite to a request path"""
+    if path_rewrite:
+        for old_path, new_path in path_rewrite.items():
+            if original_path.startswith(old_path):
+                return original_path.replace(old_path, new_path, 1)
+    return original_path
+
+def single_flight_key(request: Request, service_name: str, target_path: str) -> tuple:
+    """Identity of an idempotent upstream read: method, rewritten path, query and auth scope
+
+    Results are fetched with the caller's Authorization header, so by default
+    only the same token shares them; "user" widens that to the same sub and
+    "role" (opt-in) to every user of a role.
+    """
+    user = getattr(request.state, "user", None) or {}
+    if settings.SINGLE_FLIGHT_SCOPE == "role" and user.get("role"):
+        scope = ("role", user["role"])
+    elif settings.SINGLE_FLIGHT_SCOPE == "user" and user.get("sub"):
+        scope = ("user", user["sub"])
+    else:
+        scope = ("token", TokenCache.digest(request.headers.get("authorization", "")))
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    return (service_name, request.method, target_path, query, scope)
+
+async def proxy_request(request: Request, service_name: str, path_rewrite: dict = None):
+    """Generic function to proxy requests to microservices through the shared upstream pool
+
+    Buffered JSON/text proxying; identical concurrent GETs are coalesced into
+    one upstream call (see single_flight_key).
+    """
+    target_url = SERVICES[service_name]
+    target_path = str(request.url.path)
     try:
         # Build target URL with path rewriting
-        original_path = str(request.url.path)
-        target_path = original_path
-        
-        if path_rewrite:
-            for old_path, new_path in path_rewrite.items():
-                if original_path.startswith(old_path):
-                    target_path = original_path.replace(old_path, new_path, 1)
-                    break
-        
+        target_path = rewrite_path(target_path, path_rewrite)
         full_url = f"{target_url.rstrip('/')}{target_path}"
         
         # Get request body
         body = await request.body()
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.request(
+        async def fetch():
+            # Reuse a keep-alive connection from the service pool, behind the service's breaker and bulkhead
+            response = await upstream_guard.call(service_name, lambda timeout: upstream_pool.request(
+                service_name,
                 method=request.method,
                 url=full_url,
                 params=request.query_params,
@@ -47,82 +114,153 @@ async def proxy_request(request: Request, target_url: str, path_rewrite: dict =
                 headers={
                     key: value for key, value in request.headers.items()
                     if key.lower() not in ['host', 'content-length']
-                }
-            )
-            
+                },
+                timeout=timeout
+            ))
             return response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
+        
+        # Identical concurrent GETs share one upstream call and one parsed result
+        if settings.SINGLE_FLIGHT_ENABLED and request.method in ("GET", "HEAD") and not body:
+            key = single_flight_key(request, service_name, target_path)
+            return await single_flight.do(key, fetch, group=service_name.lower())
+        return await fetch()
             
+    except HTTPException:
+        raise
+    except httpx.TimeoutException:
+        logger.error("Timeout error for %s%s", target_url, target_path)
+        raise HTTPException(status_code=504, detail="Service timeout")
+    except httpx.RequestError as e:
+        logger.error("Request error for %s: %s", target_url, e)
+        raise HTTPException(status_code=502, detail="Service unavailable")
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+class StreamRelease:
+    """Idempotent release of a streamed upstream response: connection back to the pool, bulkhead slot returned"""
+
+    def __init__(self, service_name: str, response: httpx.Response):
+        self.service_name = service_name
+        self.response = response
+        self.released = False
+
+    async def __call__(self, outcome: str):
+        if self.released:
+            return
+        self.released = True
+        # Shielded so a cancelled relay (client disconnect) still finishes releasing
+        with anyio.CancelScope(shield=True):
+            try:
+                await upstream_pool.close_stream(self.service_name, self.response, outcome)
+            finally:
+                upstream_guard.release_bulkhead(self.service_name)
+
+async def relay_stream(response: httpx.Response, release: StreamRelease):
+    """Yield the raw upstream body, releasing the response however the relay ends"""
+    outcome = "ok"
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
+    except BaseException as e:
+        outcome = failure_outcome(e)
+        raise
+    finally:
+        # Also runs on client disconnect (cancellation) or an upstream read error
+        await release(outcome)
+
+class UpstreamStreamingResponse(StreamingResponse):
+    """StreamingResponse that releases the upstream response even if the body iterator never starts"""
+
+    def __init__(self, release: StreamRelease, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # A no-op when relay_stream already released; otherwise the client went away before the body
+            await self.release("cancelled")
+
+async def stream_proxy_request(request: Request, service_name: str, path_rewrite: dict = None):
+    """Pass-through proxy that streams the request and response bodies without buffering or re-encoding"""
+    target_url = SERVICES[service_name]
+    target_path = rewrite_path(str(request.url.path), path_rewrite)
+    full_url = f"{target_url.rstrip('/')}{target_path}"
+
+    # Forward the client body chunk by chunk; keep content-length so upstream sees the same framing
+    headers = {
+        key: value for key, value in request.headers.items()
+        if key.lower() != 'host' and key.lower() not in HOP_BY_HOP_HEADERS
+    }
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+
+    try:
+        client = upstream_pool.client(service_name)
+
+        def send(timeout: float):
+            upstream_request = client.build_request(
+                method=request.method,
+                url=full_url,
+                params=request.query_params,
+                content=request.stream() if has_body else None,
+                headers=headers,
+                timeout=timeout,
+            )
+            return upstream_pool.open_stream(service_name, upstream_request)
+
+        # The bulkhead slot stays taken until the body has been relayed, not just the headers
+        response = await upstream_guard.call(service_name, send, hold_bulkhead=True)
+    except HTTPException:
+        raise
     except httpx.TimeoutException:
-        logger.error(f"Timeout error for {target_url}{target_path}")
+        logger.error("Timeout error for %s%s", target_url, target_path)
         raise HTTPException(status_code=504, detail="Service timeout")
     except httpx.RequestError as e:
-        logger.error(f"Request error for {target_url}: {str(e)}")
+        logger.error("Request error for %s: %s", target_url, e)
         raise HTTPException(status_code=502, detail="Service unavailable")
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+    # Raw chunks keep the upstream content-encoding, so content-length stays valid
+    response_headers = {
+        key: value for key, value in response.headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
+    release = StreamRelease(service_name, response)
+    return UpstreamStreamingResponse(
+        release,
+        relay_stream(response, release),
+        status_code=response.status_code,
+        headers=response_headers,
+    )
+
 # Dashboard ENDPOINTS
 @router.get("/dashboard/metrics")
 async def get_dashboard_metrics(auth: bool = Depends(authenticate_request)):
-    """Get aggregated dashboard metrics from multiple services"""
+    """Get dashboard metrics from the incrementally maintained fleet aggregates"""
     try:
-        logger.info("Fetching dashboard metrics")
-        
-        # Mock data for now - in production, this would aggregate from multiple services
-        mock_metrics = {
-            "totalEquipment": 247,
-            "onlineEquipment": 235,
-            "activeAlerts": 23,
-            "scheduledMaintenance": 18,
-            "averageEfficiency": 94.2,
-            "uptime": 98.5,
-            "trends": {
-                "efficiency": [
-                    {"date": "2024-01-01T00:00:00Z", "value": 93.1},
-                    {"date": "2024-01-02T00:00:00Z", "value": 94.2},
-                    {"date": "2024-01-03T00:00:00Z", "value": 95.1},
-                ],
-                "uptime": [
-                    {"date": "2024-01-01T00:00:00Z", "value": 97.8},
-                    {"date": "2024-01-02T00:00:00Z", "value": 98.5},
-                    {"date": "2024-01-03T00:00:00Z", "value": 98.1},
-                ],
-                "maintenance": [
-                    {"date": "2024-01-01T00:00:00Z", "value": 15},
-                    {"date": "2024-01-02T00:00:00Z", "value": 18},
-                    {"date": "2024-01-03T00:00:00Z", "value": 12},
-                ]
-            }
-        }
-        
-        logger.info("Dashboard metrics retrieved successfully")
-        return {"success": True, "data": mock_metrics}
+        metrics = fleet_aggregates.stats()
+        metrics["trends"] = fleet_aggregates.trends()
+        return {"success": True, "data": metrics}
         
     except Exception as e:
-        logger.error(f"Dashboard metrics error: {str(e)}")
+        logger.error("Dashboard metrics error: %s", e)
         raise HTTPException(status_code=500, detail="Failed to fetch dashboard metrics")
 
 @router.get("/dashboard/stats")
 async def get_dashboard_stats(auth: bool = Depends(authenticate_request)):
-    """Get dashboard stats (mock data)"""
+    """Get current dashboard stats from the fleet aggregates"""
     try:
-        # Replace this with your actual data generator if available
-        stats = {
-            "totalEquipment": 247,
-            "onlineEquipment": 235,
-            "activeAlerts": 23,
-            "scheduledMaintenance": 18,
-            "averageEfficiency": 94.2,
-            "uptime": 98.5
-        }
         return {
             "success": True,
-            "data": stats,
+            "data": fleet_aggregates.stats(),
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
-        logger.error(f"Dashboard stats error: {str(e)}")
+        logger.error("Dashboard stats error: %s", e)
         return {
             "success": False,
             "error": "Failed to fetch dashboard stats",
@@ -132,36 +270,247 @@ async def get_dashboard_stats(auth: bool = Depends(authenticate_request)):
         
 #EQUIPEMENT ENDPOINTS
 
+def split_param(value: str) -> list:
+    """Comma-separated query value as a list, empty when absent"""
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
 @router.get("/equipment")
-async def get_equipment_list(auth: bool = Depends(authenticate_request)):
-    """Get equipment list (mock data)"""
+async def get_equipment_list(
+    cursor: str = None,
+    limit: int = Query(None, ge=1),
+    fields: str = None,
+    status: str = None,
+    type: str = None,
+    model: str = None,
+    location: str = None,
+    locationPrefix: str = None,
+    since: int = Query(None, ge=0),
+    auth: bool = Depends(authenticate_request)
+):
+    """Get a page of equipment, filtered by comma-separated status/type/model/location values
+
+    With `since`, returns only the equipment changed or removed after that
+    registry version instead of a page.
+    """
     try:
-        equipment = mock_data_generator.get_equipment_list()
+        projection = split_param(fields)
+        if since is not None:
+            changes = equipment_registry.changes_since(since, projection)
+            if changes is None:
+                raise HTTPException(status_code=410, detail=f"Changes since version {since} are no longer available; resync")
+            return {
+                "success": True,
+                **changes,
+                "version": equipment_registry.version,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+
+        limit = min(limit or settings.EQUIPMENT_PAGE_LIMIT, settings.EQUIPMENT_MAX_PAGE_LIMIT)
+        filters = {
+            field: split_param(value)
+            for field, value in zip(INDEXED_FIELDS, (location, type, status, model)) if value
+        }
+        page = equipment_registry.page(filters, locationPrefix, cursor, limit, projection)
         return {
             "success": True,
-            "data": equipment,
+            "data": page["data"],
+            "pagination": {"nextCursor": page["nextCursor"], "limit": limit, "total": page["total"]},
+            "version": equipment_registry.version,
             "timestamp": datetime.utcnow().isoformat()
         }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Equipment list error: {str(e)}")
+        logger.error("Equipment list error: %s", e)
         return {
             "success": False,
             "error": "Failed to fetch equipment list",
             "timestamp": datetime.utcnow().isoformat()
         }
 
-@router.get("/sensors/{equipment_id}/data")
-async def get_sensor_data(equipment_id: str, auth: bool = Depends(authenticate_request)):
-    """Get sensor data for a specific equipment (mock data)"""
+class EquipmentUpdate(BaseModel):
+    """Equipment update model: only the fields given are changed"""
+    status: Optional[str] = None
+    location: Optional[str] = None
+    model: Optional[str] = None
+
+@router.get("/equipment/{equipment_id}")
+async def get_equipment(equipment_id: str, fields: str = None, auth: bool = Depends(authenticate_request)):
+    """Get one equipment by ID"""
+    record = equipment_registry.get(equipment_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    return {
+        "success": True,
+        "data": equipment_registry.project(record, split_param(fields)),
+        "version": equipment_registry.version
+    }
+
+@router.patch("/equipment/{equipment_id}")
+async def update_equipment(request: Request, equipment_id: str, update: EquipmentUpdate, auth: bool = Depends(authenticate_request)):
+    """Change status, location or model of one equipment (admin only)"""
+    if request.state.user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    record = equipment_registry.update(equipment_id, update.model_dump(exclude_none=True))
+    if record is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    logger.info("Equipment %s updated to version %s", equipment_id, equipment_registry.version)
+    return {"success": True, "data": record, "version": equipment_registry.version}
+
+# Notification reads are proxied to the notification service; identical concurrent GETs share one upstream call
+@router.get("/notifications")
+@router.get("/notifications/{notification_path:path}")
+async def get_notifications(request: Request, auth: bool = Depends(authenticate_request)):
+    """Read notifications from the notification service"""
+    return await proxy_request(request, "NOTIFICATION_SERVICE")
+
+# Bulk sensor exports are streamed straight from the sensor service
+@router.get("/sensors/export")
+async def export_sensor_data(request: Request, auth: bool = Depends(authenticate_request)):
+    """Stream a bulk sensor data export from the sensor service"""
+    return await stream_proxy_request(request, "SENSOR_SERVICE")
+
+def parse_time_param(value: str, name: str):
+    """Parse a from/to query value given as epoch milliseconds or ISO 8601 into epoch seconds"""
+    if value is None:
+        return None
     try:
-        sensor_data = mock_data_generator.generate_sensor_data(equipment_id)
+        return float(value) / 1000
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid '{name}' time: {value}")
+    if parsed.tzinfo is None:
+        return (parsed - datetime(1970, 1, 1)).total_seconds()
+    return parsed.timestamp()
+
+def read_sensor_samples(equipment: dict, start_ts: float = None, end_ts: float = None, limit: int = None) -> dict:
+    """(timestamps, values) arrays per parameter: latest reading per sensor, or stored samples in [start_ts, end_ts]"""
+    if not sensor_store.has_equipment(equipment["id"]):
+        now = time.time()
         return {
+            sensor["parameter"]: (np.array([now]), np.array([mock_data_generator.generate_sensor_value(sensor["parameter"])]))
+            for sensor in equipment["sensors"]
+        }
+    if start_ts is None and end_ts is None and limit is None:
+        return {
+            parameter: (np.array([sample[0]]), np.array([sample[1]], dtype=np.float32)) if sample else (np.empty(0), np.empty(0, dtype=np.float32))
+            for parameter, sample in sensor_store.latest(equipment["id"]).items()
+        }
+    return sensor_store.query(equipment["id"], start_ts, end_ts, limit)
+
+def read_sensor_data(equipment_id: str, start_ts: float = None, end_ts: float = None, limit: int = None) -> list:
+    """Sensor readings of an equipment as one dict per sample"""
+    equipment = equipment_registry.get(equipment_id)
+    if not equipment:
+        return []
+    samples = read_sensor_samples(equipment, start_ts, end_ts, limit)
+    return [
+        mock_data_generator.build_sensor_reading(equipment, sensor, float(timestamp), float(value))
+        for sensor in equipment["sensors"] if sensor["parameter"] in samples
+        for timestamp, value in zip(*samples[sensor["parameter"]])
+    ]
+
+def sensor_columns(equipment_id: str, start_ts: float = None, end_ts: float = None, limit: int = None):
+    """Columnar sensor data: per-sensor metadata once plus parallel epoch-ms timestamp and value arrays"""
+    equipment = equipment_registry.get(equipment_id)
+    samples = read_sensor_samples(equipment, start_ts, end_ts, limit) if equipment else {}
+    sensors = [
+        {
+            "parameter": sensor["parameter"],
+            "sensorType": sensor["type"],
+            "unit": mock_data_generator.get_sensor_unit(sensor["parameter"]),
+            "threshold": mock_data_generator.get_sensor_threshold(sensor["parameter"]),
+            "timestamps": epoch_ms(samples[sensor["parameter"]][0]),
+            "values": samples[sensor["parameter"]][1],
+        }
+        for sensor in (equipment["sensors"] if equipment else []) if sensor["parameter"] in samples
+    ]
+    return {
+        "equipmentId": equipment_id,
+        "location": equipment["location"] if equipment else None,
+        "sensors": sensors,
+    }
+
+@router.post("/sensors/ingest", status_code=202)
+async def ingest_sensor_readings(request: Request, auth: bool = Depends(authenticate_request)):
+    """Accept a batch of readings as NDJSON or a binary frame (application/octet-stream); acked before persistence"""
+    content_length = request.headers.get("content-length")
+    if content_length:
+        try:
+            declared_length = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+        if declared_length > settings.INGEST_MAX_BODY_BYTES:
+            raise HTTPException(status_code=413, detail="Ingest batch too large")
+    # Chunked uploads have no Content-Length, so the cap is enforced while reading
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > settings.INGEST_MAX_BODY_BYTES:
+            raise HTTPException(status_code=413, detail="Ingest batch too large")
+        chunks.append(chunk)
+    body = b"".join(chunks)
+
+    try:
+        if request.headers.get("content-type", "").startswith("application/octet-stream"):
+            batch = parse_frame(body)
+        else:
+            batch = parse_ndjson(body)
+        result = sensor_ingestor.submit(batch)
+    except IngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail="Ingest queue is full", headers={"Retry-After": str(e.retry_after)})
+    return {
+        "success": True,
+        "data": result,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/sensors/{equipment_id}/data")
+async def get_sensor_data(
+    request: Request,
+    equipment_id: str,
+    start: str = Query(None, alias="from"),
+    end: str = Query(None, alias="to"),
+    limit: int = Query(None, ge=1),
+    format: str = None,
+    auth: bool = Depends(authenticate_request)
+):
+    """Get sensor data for a specific equipment: latest reading per sensor, or samples in [from, to]
+
+    The response format is negotiated from ?format= or Accept: json (one dict
+    per sample), columnar, msgpack (columnar layout) or arrow.
+    """
+    fmt = negotiate_format(request, format)
+    start_ts = parse_time_param(start, "from")
+    end_ts = parse_time_param(end, "to")
+    try:
+        if fmt == "json":
+            data = read_sensor_data(equipment_id, start_ts, end_ts, limit)
+        else:
+            data = sensor_columns(equipment_id, start_ts, end_ts, limit)
+        payload = {
             "success": True,
-            "data": sensor_data,
+            "data": data,
             "timestamp": datetime.utcnow().isoformat()
         }
+        if fmt != "arrow":
+            return encode_response(fmt, payload)
+        sensors = data.pop("sensors")
+        columns = {
+            sensor["parameter"]: {"timestamp": sensor.pop("timestamps"), "value": sensor.pop("values")}
+            for sensor in sensors
+        }
+        data["sensors"] = sensors
+        return encode_response(fmt, payload, columns, payload)
     except Exception as e:
-        logger.error(f"Sensor data error for {equipment_id}: {str(e)}")
+        logger.error("Sensor data error for %s: %s", equipment_id, e)
         return {
             "success": False,
             "error": "Failed to fetch sensor data",
@@ -169,18 +518,90 @@ async def get_sensor_data(equipment_id: str, auth: bool = Depends(authenticate_r
         }
         
         
+@router.get("/sensors/{equipment_id}/aggregate")
+async def get_sensor_aggregate(
+    request: Request,
+    equipment_id: str,
+    parameter: str = None,
+    bucket: str = "1m",
+    aggs: str = "min,max,mean",
+    lttb: int = Query(None, ge=3),
+    start: str = Query(None, alias="from"),
+    end: str = Query(None, alias="to"),
+    format: str = None,
+    auth: bool = Depends(authenticate_request)
+):
+    """Bucketed min/max/mean/p95/count per sensor, or LTTB-downsampled points when ?lttb=N
+
+    Already columnar; ?format= or Accept selects json, msgpack or arrow encoding.
+    """
+    fmt = negotiate_format(request, format)
+    start_ts = parse_time_param(start, "from")
+    end_ts = parse_time_param(end, "to")
+    aggregations = [agg.strip() for agg in aggs.split(",") if agg.strip()]
+    unknown = [agg for agg in aggregations if agg not in SUPPORTED_AGGREGATIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported aggregations: {', '.join(unknown)}")
+    try:
+        width = parse_duration(bucket)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid bucket width: {bucket}")
+    if width <= 0:
+        raise HTTPException(status_code=400, detail=f"Invalid bucket width: {bucket}")
+
+    series_by_parameter = sensor_store.series.get(equipment_id, {})
+    if parameter is not None:
+        series_by_parameter = {
+            name: series for name, series in series_by_parameter.items() if name == parameter
+        }
+    try:
+        result = {}
+        for name, series in series_by_parameter.items():
+            if lttb is not None:
+                points = downsample_series(series, start_ts, end_ts, lttb)
+                result[name] = {
+                    "source": points["source"],
+                    "timestamps": epoch_ms(points["timestamps"]),
+                    "values": round_column(points["values"]),
+                }
+            else:
+                buckets = aggregate_series(series, start_ts, end_ts, width, aggregations)
+                result[name] = {
+                    "source": buckets.pop("source"),
+                    "buckets": epoch_ms(buckets.pop("buckets")),
+                    **{agg: round_column(column) for agg, column in buckets.items()},
+                }
+        payload = {
+            "success": True,
+            "data": {"equipmentId": equipment_id, "bucket": width, "series": result},
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        if fmt != "arrow":
+            return encode_response(fmt, payload)
+        sources = {name: columns.pop("source") for name, columns in result.items()}
+        metadata = {**payload, "data": {"equipmentId": equipment_id, "bucket": width, "sources": sources}}
+        return encode_response(fmt, payload, result, metadata)
+    except Exception as e:
+        logger.error("Sensor aggregate error for %s: %s", equipment_id, e)
+        return {
+            "success": False,
+            "error": "Failed to aggregate sensor data",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+        
 @router.get("/alerts/{equipment_id}")
 async def get_alerts(equipment_id: str, auth: bool = Depends(authenticate_request)):
-    """Get alerts for a specific equipment (mock data)"""
+    """Get active alerts for a specific equipment from the alert engine"""
     try:
-        alerts = mock_data_generator.generate_alerts(equipment_id)
+        alerts = alert_engine.get_alerts(equipment_id)
         return {
             "success": True,
             "data": alerts,
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
-        logger.error(f"Alerts error for {equipment_id}: {str(e)}")
+        logger.error("Alerts error for %s: %s", equipment_id, e)
         return {
             "success": False,
             "error": "Failed to fetch alerts",
@@ -188,38 +609,219 @@ async def get_alerts(equipment_id: str, auth: bool = Depends(authenticate_reques
         }
 
 @router.get("/predictions/{equipment_id}")
-async def get_predictions(equipment_id: str, auth: bool = Depends(authenticate_request)):
-    """Get predictions for a specific equipment (mock data)"""
+async def get_predictions(equipment_id: str, parameter: str = "motor_temperature", auth: bool = Depends(authenticate_request)):
+    """Get predictions for a specific equipment, micro-batched with concurrent requests"""
+    if equipment_registry.get(equipment_id) is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
     try:
-        predictions = mock_data_generator.generate_predictions(equipment_id)
+        prediction = await prediction_batcher.predict(equipment_id, parameter)
         return {
             "success": True,
-            "data": predictions,
+            "data": [prediction],
             "timestamp": datetime.utcnow().isoformat()
         }
+    except HTTPException:
+        raise
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Service timeout")
+    except httpx.RequestError:
+        raise HTTPException(status_code=502, detail="Service unavailable")
     except Exception as e:
-        logger.error(f"Predictions error for {equipment_id}: {str(e)}")
+        logger.error("Predictions error for %s: %s", equipment_id, e)
         return {
             "success": False,
             "error": "Failed to fetch predictions",
             "timestamp": datetime.utcnow().isoformat()
         }
 
+# BATCH ENDPOINTS
+class BatchRequest(BaseModel):
+    """Batch request model: explicit equipment IDs and/or a location prefix"""
+    equipmentIds: List[str] = []
+    location: Optional[str] = None
+
+def resolve_batch_ids(batch: BatchRequest) -> list:
+    """Equipment IDs named in a batch request, de-duplicated in request order"""
+    equipment_ids = list(batch.equipmentIds)
+    if batch.location:
+        equipment_ids += sorted(equipment_registry.location_ids(batch.location))
+    equipment_ids = list(dict.fromkeys(equipment_ids))
+    if not equipment_ids:
+        raise HTTPException(status_code=400, detail="equipmentIds or location is required")
+    if len(equipment_ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_IDS} equipment per batch")
+    return equipment_ids
+
+def run_batch(equipment_ids: list, fetch, label: str) -> dict:
+    """Resolve each ID independently; failures are reported per ID instead of failing the batch"""
+    data, errors = {}, {}
+    for equipment_id in equipment_ids:
+        if equipment_registry.get(equipment_id) is None:
+            errors[equipment_id] = "Equipment not found"
+            continue
+        try:
+            data[equipment_id] = fetch(equipment_id)
+        except Exception as e:
+            logger.error("%s batch error for %s: %s", label, equipment_id, e)
+            errors[equipment_id] = f"Failed to fetch {label}"
+    return {
+        "success": True,
+        "data": data,
+        "errors": errors,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.post("/sensors/batch")
+async def get_sensor_data_batch(batch: BatchRequest, auth: bool = Depends(authenticate_request)):
+    """Latest sensor readings for many equipment in one call"""
+    return run_batch(resolve_batch_ids(batch), read_sensor_data, "sensor data")
+
+@router.post("/alerts/batch")
+async def get_alerts_batch(batch: BatchRequest, auth: bool = Depends(authenticate_request)):
+    """Active alerts for many equipment in one call"""
+    return run_batch(resolve_batch_ids(batch), alert_engine.get_alerts, "alerts")
+
+@router.post("/predictions/batch")
+async def get_predictions_batch(batch: BatchRequest, auth: bool = Depends(authenticate_request)):
+    """Predictions for many equipment in one call, sent to the backend in micro-batches"""
+    equipment_ids = resolve_batch_ids(batch)
+    known = [equipment_id for equipment_id in equipment_ids if equipment_registry.get(equipment_id) is not None]
+    results = await asyncio.gather(
+        *(prediction_batcher.predict(equipment_id, "motor_temperature") for equipment_id in known),
+        return_exceptions=True
+    )
+    data, errors = {}, {equipment_id: "Equipment not found" for equipment_id in equipment_ids if equipment_id not in known}
+    for equipment_id, result in zip(known, results):
+        if isinstance(result, Exception):
+            logger.error("predictions batch error for %s: %s", equipment_id, result)
+            errors[equipment_id] = "Failed to fetch predictions"
+        else:
+            data[equipment_id] = [result]
+    return {
+        "success": True,
+        "data": data,
+        "errors": errors,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Live telemetry push, replacing dashboard polling
+def parse_subscription(equipment_ids: str, topics: str):
+    """Split comma-separated equipmentIds/topics query values"""
+    return (
+        [eq.strip() for eq in equipment_ids.split(",") if eq.strip()],
+        [topic.strip() for topic in topics.split(",") if topic.strip()],
+    )
+
+@router.get("/stream/sse")
+async def stream_sse(
+    request: Request,
+    equipmentIds: str,
+    topics: str = "readings,alerts,predictions",
+    auth: bool = Depends(authenticate_request)
+):
+    """Server-Sent Events stream of readings/alerts/predictions for the given equipment ("*" for all)"""
+    equipment_ids, topic_list = parse_subscription(equipmentIds, topics)
+    subscription = telemetry_hub.open()
+    try:
+        telemetry_hub.subscribe(subscription, equipment_ids, topic_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info("SSE client subscribed to %s topic keys", len(subscription.keys))
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(timeout=settings.TELEMETRY_HEARTBEAT)
+                if not batch:
+                    yield ": keepalive\n\n"
+                for topic, text in batch:
+                    yield f"event: {topic}\ndata: {text}\n\n"
+        finally:
+            telemetry_hub.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.websocket("/stream/ws")
+async def stream_websocket(websocket: WebSocket):
+    """WebSocket stream; clients send {"action": "subscribe"|"unsubscribe", "equipmentIds": [...], "topics": [...]}"""
+    # Browsers cannot set headers on WebSocket requests, so accept the token as a query parameter too
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    try:
+        verify_token(token or "")
+    except HTTPException as e:
+        logger.warning("WebSocket authentication failed: %s", e.detail)
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    subscription = telemetry_hub.open()
+
+    async def receive_commands():
+        while True:
+            command = await websocket.receive_json()
+            equipment_ids = command.get("equipmentIds", [])
+            topics = command.get("topics", list(TOPICS))
+            try:
+                if command.get("action") == "unsubscribe":
+                    telemetry_hub.unsubscribe(subscription, [(t, eq) for t in topics for eq in equipment_ids])
+                else:
+                    telemetry_hub.subscribe(subscription, equipment_ids, topics)
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+
+    async def send_updates():
+        while True:
+            for _, text in await subscription.next_batch():
+                await websocket.send_text(text)
+
+    receiver = asyncio.create_task(receive_commands())
+    sender = asyncio.create_task(send_updates())
+    try:
+        done, pending = await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                logger.error("WebSocket stream error: %s", task.exception())
+    finally:
+        telemetry_hub.unsubscribe(subscription)
+
+@router.get("/stream/stats")
+async def get_stream_stats(auth: bool = Depends(authenticate_request)):
+    """Get live subscriber counts and backpressure counters"""
+    return {
+        "success": True,
+        "data": telemetry_hub.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Model uploads and downloads are streamed to and from the AI service
+@router.api_route("/models/{model_path:path}", methods=["GET", "POST", "PUT"])
+async def proxy_models(request: Request, model_path: str, auth: bool = Depends(authenticate_request)):
+    """Stream model artifacts between clients and the AI service"""
+    return await stream_proxy_request(request, "AI_SERVICE")
+
 # Configuration endpoint
 @router.get("/config")
+@cached_response(ttl=60, stale_ttl=300)
 async def get_system_config(auth: bool = Depends(authenticate_request)):
     """Get system configuration settings"""
     try:
         logger.info("Retrieving system configuration")
         
         config = {
-            "aiProvider": os.getenv("AI_PROVIDER", "openai"),
-            "sensorUpdateInterval": int(os.getenv("SENSOR_UPDATE_INTERVAL", "1000")),
+            "aiProvider": settings.AI_PROVIDER,
+            "sensorUpdateInterval": settings.SENSOR_UPDATE_INTERVAL,
             "alertThresholds": {
                 "temperature": {"warning": 70, "critical": 85, "unit": "°C"},
                 "vibration": {"warning": 5, "critical": 10, "unit": "mm/s"},
                 "current": {"warning": 80, "critical": 95, "unit": "A"}
             },
+            # Per-parameter rules the alert engine actually enforces
+            "sensorThresholds": SENSOR_THRESHOLDS,
             "maintenanceSchedule": {
                 "preventiveInterval": 30,
                 "inspectionInterval": 7,
@@ -236,46 +838,149 @@ async def get_system_config(auth: bool = Depends(authenticate_request)):
         return {"success": True, "data": config}
         
     except Exception as e:
-        logger.error(f"Configuration retrieval error: {str(e)}")
+        logger.error("Configuration retrieval error: %s", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve configuration")
 
+# Upstream connection pool stats for sizing
+@router.get("/gateway/pools")
+async def get_pool_stats(auth: bool = Depends(authenticate_request)):
+    """Get in-use and waiting request counts and connections opened for each upstream connection pool"""
+    return {
+        "success": True,
+        "data": upstream_pool.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Circuit breaker state per upstream service
+@router.get("/gateway/breakers")
+async def get_breaker_stats(auth: bool = Depends(authenticate_request)):
+    """Get circuit breaker state, adaptive timeout and bulkhead usage for each upstream"""
+    return {
+        "success": True,
+        "data": upstream_guard.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Verified-token cache stats
+@router.get("/gateway/auth-cache")
+async def get_auth_cache_stats(auth: bool = Depends(authenticate_request)):
+    """Get hit/miss counters for the verified-token cache"""
+    return {
+        "success": True,
+        "data": token_cache.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Response cache stats and explicit invalidation
+@router.get("/gateway/cache")
+async def get_cache_stats(auth: bool = Depends(authenticate_request)):
+    """Get response cache hit/miss counters"""
+    return {
+        "success": True,
+        "data": response_cache.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.post("/gateway/cache/invalidate")
+async def invalidate_cache(request: Request, prefix: str = None, auth: bool = Depends(authenticate_request)):
+    """Drop cached responses for routes under prefix (admin only)"""
+    if request.state.user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    removed = response_cache.invalidate(prefix)
+    return {
+        "success": True,
+        "data": {"invalidated": removed},
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Single-flight coalescing stats
+@router.get("/gateway/coalescing")
+async def get_coalescing_stats(auth: bool = Depends(authenticate_request)):
+    """Get calls vs upstream executions for coalesced GETs, per upstream service"""
+    return {
+        "success": True,
+        "data": single_flight.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Rate limiting and admission control stats
+@router.get("/gateway/rate-limits")
+async def get_rate_limit_stats(auth: bool = Depends(authenticate_request)):
+    """Token-bucket and load-shedding counters"""
+    return {
+        "success": True,
+        "data": {"rateLimits": rate_limiter.stats(), "admission": admission_controller.stats()},
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Prediction micro-batching stats
+@router.get("/gateway/predictions")
+async def get_prediction_stats(auth: bool = Depends(authenticate_request)):
+    """Get prediction batch sizes, per-item errors and cache hit counts"""
+    return {
+        "success": True,
+        "data": prediction_batcher.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/gateway/workers")
+async def get_worker_stats(auth: bool = Depends(authenticate_request)):
+    """Get this worker's PID and its shared state connection, plus the shared state server's counters"""
+    data = {"pid": os.getpid(), "sharedState": shared_state.stats()}
+    if shared_state.enabled:
+        try:
+            data["sharedStateServer"] = await shared_state.call("stats")
+        except Exception as e:
+            logger.error("Shared state stats error: %s", e)
+    return {
+        "success": True,
+        "data": data,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Ingestion queue and write-behind stats
+@router.get("/gateway/ingest")
+async def get_ingest_stats(auth: bool = Depends(authenticate_request)):
+    """Get accepted, rejected, queued and persisted reading counts"""
+    return {
+        "success": True,
+        "data": sensor_ingestor.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Logging pipeline queue depth and drop counters
+@router.get("/gateway/logging")
+async def get_logging_stats(auth: bool = Depends(authenticate_request)):
+    """Get records queued, dropped on overflow and sampled out"""
+    return {
+        "success": True,
+        "data": log_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 # Health check for gateway itself
 @router.get("/health")
-async def gateway_health():
-    """Health check endpoint for the API gateway"""
+async def gateway_health(fresh: bool = False):
+    """Health check endpoint for the API gateway, served from the background prober cache"""
     try:
-        # Check connectivity to all services
-        service_status = {}
-        
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            for service_name, service_url in SERVICES.items():
-                try:
-                    response = await client.get(f"{service_url}/health")
-                    service_status[service_name.lower()] = {
-                        "status": "healthy" if response.status_code == 200 else "unhealthy",
-                        "response_time": response.elapsed.total_seconds()
-                    }
-                except:
-                    service_status[service_name.lower()] = {
-                        "status": "unreachable",
-                        "response_time": None
-                    }
-        
-        overall_status = "healthy" if all(
-            s["status"] == "healthy" for s in service_status.values()
-        ) else "degraded"
-        
-        logger.info(f"Gateway health check completed - Status: {overall_status}")
+        # ?fresh=1 asks for a live check; this route is public and not rate limited, so concurrent
+        # requests share one probe and a result younger than HEALTH_FRESH_MIN_INTERVAL is reused
+        if health_prober.checked_at is None:
+            await health_prober.refresh()
+        elif fresh:
+            await health_prober.refresh(settings.HEALTH_FRESH_MIN_INTERVAL)
+        snapshot = health_prober.snapshot()
         
         return {
-            "status": overall_status,
+            "status": snapshot["status"],
             "service": "api_gateway",
             "timestamp": datetime.utcnow().isoformat(),
-            "services": service_status
+            "checked_at": snapshot["checked_at"],
+            "services": snapshot["services"]
         }
         
     except Exception as e:
-        logger.error(f"Health check error: {str(e)}")
+        logger.error("Health check error: %s", e)
         return {
             "status": "unhealthy",
             "service": "api_gateway",
@@ -0,0 +1,88 @@
+# Global admission control: shed requests early when the event loop lags or too many are in flight
+import asyncio
+import time
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+from backend_python.api_gateway.app.services.metrics import event_loop_lag
+
+logger = setup_logger("api_gateway_admission")
+
+class LoopLagMonitor:
+    """Measures event-loop lag as how late a periodic sleep wakes up"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - started - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            event_loop_lag.observe(self.lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+class AdmissionController:
+    """Rejects new requests while in-flight count or loop lag is over its limit"""
+
+    def __init__(self, max_in_flight: int, max_loop_lag: float, lag_monitor: LoopLagMonitor):
+        self.max_in_flight = max_in_flight
+        self.max_loop_lag = max_loop_lag
+        self.lag_monitor = lag_monitor
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = {"in_flight": 0, "loop_lag": 0}
+        self._last_warning = 0.0
+
+    def try_admit(self) -> bool:
+        """Count the request in flight if there is room; call release() when it finishes"""
+        reason = None
+        if self.in_flight >= self.max_in_flight:
+            reason = "in_flight"
+        elif self.lag_monitor.lag > self.max_loop_lag:
+            reason = "loop_lag"
+        if reason is not None:
+            self.shed[reason] += 1
+            now = time.monotonic()
+            if now - self._last_warning > 5:
+                self._last_warning = now
+                logger.warning("Shedding load (%s): in_flight=%s loop_lag=%.3fs", reason, self.in_flight, self.lag_monitor.lag)
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "loop_lag": self.lag_monitor.lag,
+            "max_loop_lag_seen": self.lag_monitor.max_lag,
+            "max_loop_lag": self.max_loop_lag,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
+
+loop_lag_monitor = LoopLagMonitor(settings.ADMISSION_LAG_INTERVAL)
+admission_controller = AdmissionController(
+    settings.ADMISSION_MAX_IN_FLIGHT, settings.ADMISSION_MAX_LOOP_LAG, loop_lag_monitor
+)
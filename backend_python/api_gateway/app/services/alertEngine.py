@@ -0,0 +1,128 @@
+# Vectorized fleet-wide threshold evaluation for sensor alerts
+from datetime import datetime
+import numpy as np
+from backend_python.shared.logger import setup_logger
+
+logger = setup_logger("api_gateway_alerts")
+
+NONE, WARNING, CRITICAL = 0, 1, 2
+LEVEL_NAMES = {WARNING: "warning", CRITICAL: "critical"}
+LEVEL_PRIORITIES = {WARNING: "medium", CRITICAL: "high"}
+
+class AlertEngine:
+    """Evaluates an equipment x parameter matrix of readings against warning/critical thresholds
+
+    A level fires only after readings stay at or above it for the parameter's
+    minDuration, and clears only once readings fall below threshold minus
+    hysteresis. Each (equipment, parameter) has at most one active alert.
+    """
+
+    def __init__(self, thresholds: dict):
+        self.parameters = list(thresholds)
+        self.columns = {parameter: i for i, parameter in enumerate(self.parameters)}
+        self.warning = np.array([thresholds[p]["warning"] for p in self.parameters], dtype=np.float64)
+        self.critical = np.array([thresholds[p]["critical"] for p in self.parameters], dtype=np.float64)
+        self.hysteresis = np.array([thresholds[p].get("hysteresis", 0) for p in self.parameters], dtype=np.float64)
+        self.min_duration = np.array([thresholds[p].get("minDuration", 0) for p in self.parameters], dtype=np.float64)
+
+        self.equipment_ids = []
+        self.rows = {}
+        shape = (0, len(self.parameters))
+        self.level = np.zeros(shape, dtype=np.int8)
+        self.pending_level = np.zeros(shape, dtype=np.int8)
+        self.pending_since = np.zeros(shape, dtype=np.float64)
+        self.active = {}
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """Call callback(equipment_id, active_alerts) whenever an alert of that equipment fires, changes or clears"""
+        self.listeners.append(callback)
+
+    def register(self, equipment_ids):
+        """Add rows for equipment not seen before"""
+        new_ids = [eq_id for eq_id in equipment_ids if eq_id not in self.rows]
+        if not new_ids:
+            return
+        for eq_id in new_ids:
+            self.rows[eq_id] = len(self.equipment_ids)
+            self.equipment_ids.append(eq_id)
+        extra = (len(new_ids), len(self.parameters))
+        self.level = np.vstack([self.level, np.zeros(extra, dtype=np.int8)])
+        self.pending_level = np.vstack([self.pending_level, np.zeros(extra, dtype=np.int8)])
+        self.pending_since = np.vstack([self.pending_since, np.zeros(extra, dtype=np.float64)])
+
+    def empty_batch(self) -> np.ndarray:
+        """NaN matrix shaped for evaluate(); NaN means no reading this tick"""
+        return np.full((len(self.equipment_ids), len(self.parameters)), np.nan)
+
+    def evaluate(self, values: np.ndarray, timestamp: float):
+        """Evaluate one tick of readings for the whole fleet in a single vectorized pass"""
+        valid = ~np.isnan(values)
+        with np.errstate(invalid="ignore"):
+            # Level the raw reading is at, with hysteresis keeping an active level until it clears
+            candidate = np.where(values >= self.critical, CRITICAL, np.where(values >= self.warning, WARNING, NONE))
+            hold_critical = (self.level == CRITICAL) & (values >= self.critical - self.hysteresis)
+            hold_warning = (self.level >= WARNING) & (values >= self.warning - self.hysteresis)
+        candidate = np.where(hold_critical, CRITICAL, np.maximum(candidate, np.where(hold_warning, WARNING, NONE)))
+        candidate = np.where(valid, candidate, self.pending_level).astype(np.int8)
+
+        # Restart the duration clock wherever the candidate level changed
+        restarted = candidate != self.pending_level
+        self.pending_since = np.where(restarted, timestamp, self.pending_since)
+        self.pending_level = candidate
+        sustained = (timestamp - self.pending_since) >= self.min_duration
+
+        new_level = np.where(candidate == NONE, NONE, np.where(sustained, candidate, self.level)).astype(np.int8)
+        rows, columns = np.nonzero(new_level != self.level)
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            self._transition(row, column, int(new_level[row, column]), float(values[row, column]), timestamp)
+        self.level = new_level
+        return len(rows)
+
+    def _transition(self, row: int, column: int, level: int, value: float, timestamp: float):
+        """Create, escalate/de-escalate or clear the single alert of one (equipment, parameter)"""
+        equipment_id = self.equipment_ids[row]
+        parameter = self.parameters[column]
+        alerts = self.active.setdefault(equipment_id, {})
+        previous = alerts.get(parameter)
+
+        if level == NONE:
+            alerts.pop(parameter, None)
+            if not alerts:
+                del self.active[equipment_id]
+            logger.info("Alert cleared: %s %s", equipment_id, parameter)
+        else:
+            threshold = self.critical[column] if level == CRITICAL else self.warning[column]
+            name = parameter.replace("_", " ").title()
+            alert = {
+                "id": previous["id"] if previous else f"alert-{equipment_id}-{parameter}-{int(timestamp * 1000)}",
+                "equipmentId": equipment_id,
+                "type": LEVEL_NAMES[level],
+                "title": f"{name} High",
+                "message": f"{name} exceeds {LEVEL_NAMES[level]} threshold",
+                "parameter": parameter,
+                "value": round(value, 2),
+                "threshold": float(threshold),
+                "timestamp": datetime.utcfromtimestamp(timestamp).isoformat(),
+                "status": "active",
+                "priority": LEVEL_PRIORITIES[level],
+            }
+            alerts[parameter] = alert
+            logger.info("Alert %s: %s %s=%.2f", LEVEL_NAMES[level], equipment_id, parameter, value)
+
+        for callback in self.listeners:
+            try:
+                callback(equipment_id, self.get_alerts(equipment_id))
+            except Exception as e:
+                logger.error("Alert listener error: %s", e)
+
+    def get_alerts(self, equipment_id: str) -> list:
+        """Active alerts of one equipment"""
+        return list(self.active.get(equipment_id, {}).values())
+
+    def stats(self) -> dict:
+        return {
+            "equipment": len(self.equipment_ids),
+            "parameters": self.parameters,
+            "active_alerts": sum(len(alerts) for alerts in self.active.values()),
+        }
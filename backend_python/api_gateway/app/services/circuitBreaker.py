@@ -0,0 +1,214 @@
+# Circuit breakers, adaptive timeouts and bulkheads for upstream microservices
+import asyncio
+import time
+from collections import deque
+import httpx
+from fastapi import HTTPException, status
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+from backend_python.api_gateway.app.services.upstreamPool import SERVICES, get_pool_config
+
+logger = setup_logger("api_gateway_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile of a small sample"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+class CircuitBreaker:
+    """Rolling-window breaker tripped by error rate or p99 latency"""
+
+    def __init__(self, name: str, max_timeout: float):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.window = deque(maxlen=settings.BREAKER_WINDOW_SIZE)
+        self.max_timeout = max_timeout
+        self.half_open_in_flight = 0
+        self.half_open_successes = 0
+        self.listeners = []
+
+    def _transition(self, new_state: str, reason: str = "", notify: bool = True):
+        """Change state and log the transition"""
+        if new_state == self.state:
+            return
+        logger.warning("Circuit breaker for %s: %s -> %s %s", self.name, self.state, new_state, reason)
+        self.state = new_state
+        if new_state == OPEN:
+            self.opened_at = time.monotonic()
+            if notify:
+                for callback in self.listeners:
+                    callback(self.name, reason)
+        if new_state != CLOSED:
+            self.half_open_in_flight = 0
+            self.half_open_successes = 0
+        if new_state == CLOSED:
+            self.window.clear()
+
+    def trip(self, reason: str):
+        """Open the breaker on another worker's behalf, without notifying listeners again"""
+        if self.state != OPEN:
+            self._transition(OPEN, reason, notify=False)
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe call through"""
+        return max(0.0, settings.BREAKER_OPEN_SECONDS - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; reserves a probe slot when half-open"""
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                return False
+            self._transition(HALF_OPEN, "(open period elapsed)")
+        if self.state == HALF_OPEN:
+            if self.half_open_in_flight >= settings.BREAKER_HALF_OPEN_CALLS:
+                return False
+            self.half_open_in_flight += 1
+        return True
+
+    def release(self):
+        """Give back a probe slot that was reserved but not used"""
+        if self.state == HALF_OPEN and self.half_open_in_flight > 0:
+            self.half_open_in_flight -= 1
+
+    def record(self, ok: bool, latency: float):
+        """Record a call outcome and trip or reset the breaker"""
+        if self.state == HALF_OPEN:
+            self.release()
+            if not ok:
+                self._transition(OPEN, "(probe call failed)")
+                return
+            self.half_open_successes += 1
+            if self.half_open_successes >= settings.BREAKER_HALF_OPEN_CALLS:
+                self._transition(CLOSED, "(probe calls succeeded)")
+            return
+
+        self.window.append((ok, latency))
+        if len(self.window) < settings.BREAKER_MIN_CALLS:
+            return
+
+        error_rate = sum(1 for outcome, _ in self.window if not outcome) / len(self.window)
+        if error_rate >= settings.BREAKER_ERROR_RATE:
+            self._transition(OPEN, f"(error rate {error_rate:.0%})")
+            return
+        p99 = self.latency_percentile(0.99)
+        if p99 is not None and p99 >= settings.BREAKER_LATENCY_P99:
+            self._transition(OPEN, f"(p99 latency {p99:.2f}s)")
+
+    def latency_percentile(self, fraction: float):
+        """Latency percentile over successful calls in the window"""
+        latencies = [latency for ok, latency in self.window if ok]
+        return percentile(latencies, fraction) if latencies else None
+
+    def timeout(self) -> float:
+        """Timeout derived from the observed p99, bounded by the configured pool timeout"""
+        if len(self.window) < settings.BREAKER_MIN_CALLS:
+            return self.max_timeout
+        p99 = self.latency_percentile(0.99)
+        if p99 is None:
+            return self.max_timeout
+        adaptive = p99 * settings.ADAPTIVE_TIMEOUT_MULTIPLIER
+        return min(self.max_timeout, max(settings.ADAPTIVE_TIMEOUT_MIN, adaptive))
+
+    def stats(self) -> dict:
+        """Current breaker state and window metrics"""
+        failures = sum(1 for ok, _ in self.window if not ok)
+        return {
+            "state": self.state,
+            "calls": len(self.window),
+            "error_rate": failures / len(self.window) if self.window else 0.0,
+            "p50": self.latency_percentile(0.50),
+            "p99": self.latency_percentile(0.99),
+            "timeout": self.timeout(),
+            "retry_after": self.retry_after() if self.state == OPEN else None,
+        }
+
+class UpstreamGuard:
+    """Per-service circuit breaker plus bulkhead concurrency limit in front of upstream calls"""
+
+    def __init__(self, services: dict):
+        self.breakers = {
+            name: CircuitBreaker(name, get_pool_config(name)["timeout"]) for name in services
+        }
+        self.bulkheads = {
+            name: asyncio.Semaphore(settings.BULKHEAD_MAX_CONCURRENT) for name in services
+        }
+        self.bulkhead_in_use = {name: 0 for name in services}
+        self.rejected = {name: 0 for name in services}
+
+    def add_listener(self, callback):
+        """Call callback(service_name, reason) whenever one of the breakers trips open"""
+        for breaker in self.breakers.values():
+            breaker.listeners.append(callback)
+
+    def _reject(self, service_name: str, detail: str, retry_after: float = None):
+        """Fail fast with 503 instead of queueing behind a struggling upstream"""
+        self.rejected[service_name] += 1
+        headers = {"Retry-After": str(max(1, int(retry_after)))} if retry_after else None
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail, headers=headers)
+
+    async def call(self, service_name: str, send, hold_bulkhead: bool = False):
+        """Run send(timeout) under the service's breaker and bulkhead; 5xx and transport errors count as failures
+
+        With hold_bulkhead, a successful call keeps its bulkhead slot (e.g. while a
+        streamed body is relayed) until release_bulkhead is called.
+        """
+        breaker = self.breakers[service_name]
+        if not breaker.allow():
+            self._reject(service_name, "Service temporarily unavailable (circuit open)", breaker.retry_after())
+
+        bulkhead = self.bulkheads[service_name]
+        try:
+            if bulkhead.locked():
+                await asyncio.wait_for(bulkhead.acquire(), timeout=settings.BULKHEAD_MAX_WAIT)
+            else:
+                await bulkhead.acquire()
+        except asyncio.TimeoutError:
+            breaker.release()
+            self._reject(service_name, "Service overloaded (bulkhead full)", 1)
+        except BaseException:
+            # e.g. cancelled by a client disconnect; a half-open probe slot must not stay reserved
+            breaker.release()
+            raise
+        self.bulkhead_in_use[service_name] += 1
+
+        started = time.perf_counter()
+        release = True
+        try:
+            response = await send(breaker.timeout())
+            release = not hold_bulkhead
+        except (httpx.TimeoutException, httpx.RequestError):
+            breaker.record(False, time.perf_counter() - started)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        finally:
+            if release:
+                self.release_bulkhead(service_name)
+
+        breaker.record(response.status_code < 500, time.perf_counter() - started)
+        return response
+
+    def release_bulkhead(self, service_name: str):
+        """Give back a bulkhead slot kept by call(..., hold_bulkhead=True)"""
+        self.bulkhead_in_use[service_name] -= 1
+        self.bulkheads[service_name].release()
+
+    def stats(self) -> dict:
+        """Breaker and bulkhead state per service"""
+        return {
+            name.lower(): {
+                **breaker.stats(),
+                "bulkhead_available": settings.BULKHEAD_MAX_CONCURRENT - self.bulkhead_in_use[name],
+                "rejected": self.rejected[name],
+            }
+            for name, breaker in self.breakers.items()
+        }
+
+upstream_guard = UpstreamGuard(SERVICES)
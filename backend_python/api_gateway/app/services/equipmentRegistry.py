@@ -0,0 +1,182 @@
+# Equipment registry: hash index by ID, secondary indexes, keyset pagination and a change feed
+import base64
+import binascii
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from datetime import datetime
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+
+logger = setup_logger("api_gateway_equipment")
+
+INDEXED_FIELDS = ("location", "type", "status", "model")
+
+def to_record(equipment: dict) -> dict:
+    """JSON-ready copy of an equipment definition"""
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in equipment.items()
+    }
+
+def encode_cursor(equipment_id: str) -> str:
+    return base64.urlsafe_b64encode(equipment_id.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+class EquipmentRegistry:
+    """Equipment records indexed by ID and by each INDEXED_FIELDS value
+
+    IDs are also kept sorted, so pages are keyset ranges after the cursor's ID
+    and stay stable while equipment is added or removed. Every change bumps the
+    version and is logged, so a client can ask for what changed since the
+    version it last saw; once that version has left the bounded log it must
+    resync in full.
+    """
+
+    def __init__(self, change_log_size: int):
+        self.records = {}
+        self.ids = []
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        self.locations = []
+        self.version = 0
+        self.changes = deque(maxlen=change_log_size)
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """Call callback(equipment_id, record) on every change; record is None when removed"""
+        self.listeners.append(callback)
+
+    def _index(self, record: dict):
+        for field in INDEXED_FIELDS:
+            value = record.get(field)
+            ids = self.indexes[field].setdefault(value, set())
+            ids.add(record["id"])
+            if field == "location" and len(ids) == 1 and value is not None:
+                insort(self.locations, value)
+
+    def _unindex(self, record: dict):
+        for field in INDEXED_FIELDS:
+            value = record.get(field)
+            ids = self.indexes[field].get(value)
+            ids.discard(record["id"])
+            if not ids:
+                del self.indexes[field][value]
+                if field == "location" and value is not None:
+                    del self.locations[bisect_left(self.locations, value)]
+
+    def _changed(self, equipment_id: str, record):
+        self.version += 1
+        self.changes.append((self.version, equipment_id))
+        for callback in self.listeners:
+            try:
+                callback(equipment_id, record)
+            except Exception as e:
+                logger.error("Equipment listener error: %s", e)
+
+    def upsert(self, equipment: dict) -> dict:
+        """Add or replace one equipment"""
+        record = to_record(equipment)
+        equipment_id = record["id"]
+        previous = self.records.get(equipment_id)
+        if previous is not None:
+            self._unindex(previous)
+        else:
+            insort(self.ids, equipment_id)
+        self.records[equipment_id] = record
+        self._index(record)
+        self._changed(equipment_id, record)
+        return record
+
+    def update(self, equipment_id: str, changes: dict):
+        """Apply field changes to one equipment; None if it does not exist
+
+        An update that changes nothing leaves the version and change feed alone.
+        """
+        record = self.records.get(equipment_id)
+        if record is None:
+            return None
+        if all(record.get(field) == value for field, value in changes.items()):
+            return record
+        return self.upsert({**record, **changes, "id": equipment_id})
+
+    def remove(self, equipment_id: str) -> bool:
+        record = self.records.pop(equipment_id, None)
+        if record is None:
+            return False
+        self._unindex(record)
+        del self.ids[bisect_left(self.ids, equipment_id)]
+        self._changed(equipment_id, None)
+        return True
+
+    def get(self, equipment_id: str):
+        return self.records.get(equipment_id)
+
+    def location_ids(self, prefix: str) -> set:
+        """IDs of equipment whose location starts with prefix, via a range over the sorted locations"""
+        start = bisect_left(self.locations, prefix)
+        end = bisect_left(self.locations, prefix + "\U0010ffff")
+        index = self.indexes["location"]
+        return set().union(*(index[location] for location in self.locations[start:end]))
+
+    def matching_ids(self, filters: dict, location_prefix: str = None):
+        """Sorted IDs matching every filter (field -> accepted values); None means no filtering"""
+        candidates = []
+        for field, values in filters.items():
+            index = self.indexes[field]
+            candidates.append(set().union(*(index.get(value, ()) for value in values)))
+        if location_prefix:
+            candidates.append(self.location_ids(location_prefix))
+        if not candidates:
+            return None
+        candidates.sort(key=len)
+        return sorted(candidates[0].intersection(*candidates[1:]))
+
+    def page(self, filters: dict = None, location_prefix: str = None, cursor: str = None, limit: int = 100, fields: list = None) -> dict:
+        """One page of records after the cursor, optionally filtered and projected"""
+        matching = self.matching_ids(filters or {}, location_prefix)
+        ids = self.ids if matching is None else matching
+        start = bisect_right(ids, decode_cursor(cursor)) if cursor else 0
+        page_ids = ids[start:start + limit]
+        more = start + limit < len(ids)
+        return {
+            "data": [self.project(self.records[equipment_id], fields) for equipment_id in page_ids],
+            "nextCursor": encode_cursor(page_ids[-1]) if more else None,
+            "total": len(ids),
+        }
+
+    def changes_since(self, version: int, fields: list = None):
+        """Records changed and IDs removed after version; None when the log no longer reaches back that far"""
+        if version > self.version:
+            raise ValueError(f"Unknown version {version}; current version is {self.version}")
+        if version < self.version and (not self.changes or self.changes[0][0] > version + 1):
+            return None
+        changed = []
+        for change_version, equipment_id in reversed(self.changes):
+            if change_version <= version:
+                break
+            changed.append(equipment_id)
+        changed = list(dict.fromkeys(reversed(changed)))
+        return {
+            "data": [self.project(self.records[eq_id], fields) for eq_id in changed if eq_id in self.records],
+            "removed": [eq_id for eq_id in changed if eq_id not in self.records],
+        }
+
+    @staticmethod
+    def project(record: dict, fields: list = None) -> dict:
+        if not fields:
+            return record
+        return {field: record[field] for field in fields if field in record}
+
+    def stats(self) -> dict:
+        return {
+            "equipment": len(self.records),
+            "version": self.version,
+            "changeLog": len(self.changes),
+            "indexes": {field: len(index) for field, index in self.indexes.items()},
+        }
+
+equipment_registry = EquipmentRegistry(settings.EQUIPMENT_CHANGE_LOG_SIZE)
@@ -0,0 +1,158 @@
+# Incrementally maintained fleet-wide dashboard figures and daily trend rollups
+import time
+from collections import OrderedDict
+from datetime import datetime
+from backend_python.shared.config import settings
+
+ONLINE_STATUSES = frozenset(["active", "online", "operational"])
+MAINTENANCE_STATUSES = frozenset(["maintenance", "scheduled_maintenance"])
+DAY = 86400
+
+class DailyBucket:
+    """One UTC day of efficiency samples, online/equipment seconds and maintenance scheduled"""
+
+    __slots__ = ("date", "efficiency_sum", "efficiency_count", "online_seconds", "equipment_seconds", "maintenance")
+
+    def __init__(self, day: int):
+        self.date = datetime.utcfromtimestamp(day * DAY).isoformat() + "Z"
+        self.efficiency_sum = 0.0
+        self.efficiency_count = 0
+        self.online_seconds = 0.0
+        self.equipment_seconds = 0.0
+        self.maintenance = 0
+
+    def efficiency(self):
+        return self.efficiency_sum / self.efficiency_count if self.efficiency_count else None
+
+    def uptime(self):
+        return 100 * self.online_seconds / self.equipment_seconds if self.equipment_seconds else None
+
+class FleetAggregates:
+    """Fleet counters updated per event, so a dashboard read never scans equipment
+
+    Each update adjusts totals by the difference from the equipment's previous
+    state. Uptime is time-weighted: elapsed time is credited to the current
+    day's bucket on every event and read.
+    """
+
+    def __init__(self, trend_days: int):
+        self.trend_days = trend_days
+        self.status = {}
+        self.alerts = {}
+        self.maintenance = {}
+        self.efficiency = {}
+        self.total = 0
+        self.online = 0
+        self.active_alerts = 0
+        self.scheduled_maintenance = 0
+        self.efficiency_sum = 0.0
+        self.days = OrderedDict()
+        self.last_advance = None
+
+    def _bucket(self, day: int) -> DailyBucket:
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = DailyBucket(day)
+            while len(self.days) > self.trend_days:
+                self.days.popitem(last=False)
+        return bucket
+
+    def advance(self, now: float = None):
+        """Credit the time since the last event to each day it spans"""
+        now = time.time() if now is None else now
+        last = self.last_advance if self.last_advance is not None else now
+        self.last_advance = max(last, now)
+        while last < now:
+            day = int(last // DAY)
+            step = min(now, (day + 1) * DAY) - last
+            bucket = self._bucket(day)
+            bucket.equipment_seconds += self.total * step
+            bucket.online_seconds += self.online * step
+            last += step
+
+    def set_status(self, equipment_id: str, status: str, now: float = None):
+        """Register equipment or change its status; a maintenance status counts as scheduled maintenance"""
+        self.advance(now)
+        previous = self.status.get(equipment_id)
+        if previous is None:
+            self.total += 1
+        elif previous in ONLINE_STATUSES:
+            self.online -= 1
+        if status in ONLINE_STATUSES:
+            self.online += 1
+        self.status[equipment_id] = status
+        self.set_maintenance(equipment_id, status in MAINTENANCE_STATUSES, now)
+
+    def remove(self, equipment_id: str, now: float = None):
+        """Drop equipment and everything it contributed"""
+        self.advance(now)
+        status = self.status.pop(equipment_id, None)
+        if status is None:
+            return
+        self.total -= 1
+        if status in ONLINE_STATUSES:
+            self.online -= 1
+        self.set_alerts(equipment_id, [])
+        self.set_maintenance(equipment_id, False, now)
+        self.efficiency_sum -= self.efficiency.pop(equipment_id, 0.0)
+
+    def set_alerts(self, equipment_id: str, alerts: list):
+        """Active alerts of one equipment (alert engine listener signature)"""
+        count = len(alerts)
+        self.active_alerts += count - self.alerts.get(equipment_id, 0)
+        if count:
+            self.alerts[equipment_id] = count
+        else:
+            self.alerts.pop(equipment_id, None)
+
+    def set_maintenance(self, equipment_id: str, scheduled: bool, now: float = None):
+        """Mark one equipment as scheduled for maintenance (or not); counted once per day it is scheduled"""
+        was_scheduled = self.maintenance.get(equipment_id, False)
+        if scheduled == was_scheduled:
+            return
+        self.scheduled_maintenance += 1 if scheduled else -1
+        if scheduled:
+            self.maintenance[equipment_id] = True
+        else:
+            self.maintenance.pop(equipment_id, None)
+        if scheduled:
+            now = time.time() if now is None else now
+            self._bucket(int(now // DAY)).maintenance += 1
+
+    def record_efficiency(self, equipment_id: str, value: float, now: float = None):
+        """Latest efficiency of one equipment; also sampled into the day's average"""
+        now = time.time() if now is None else now
+        self.efficiency_sum += value - self.efficiency.get(equipment_id, 0.0)
+        self.efficiency[equipment_id] = value
+        bucket = self._bucket(int(now // DAY))
+        bucket.efficiency_sum += value
+        bucket.efficiency_count += 1
+
+    def stats(self, now: float = None) -> dict:
+        """Current fleet figures, read from the running counters"""
+        self.advance(now)
+        today = self.days.get(int(self.last_advance // DAY))
+        uptime = today.uptime() if today is not None else None
+        return {
+            "totalEquipment": self.total,
+            "onlineEquipment": self.online,
+            "activeAlerts": self.active_alerts,
+            "scheduledMaintenance": self.scheduled_maintenance,
+            "averageEfficiency": round(self.efficiency_sum / len(self.efficiency), 1) if self.efficiency else None,
+            "uptime": round(uptime, 1) if uptime is not None else None,
+        }
+
+    def trends(self) -> dict:
+        """Daily efficiency, uptime and maintenance series from the rollup buckets"""
+        series = {"efficiency": [], "uptime": [], "maintenance": []}
+        for bucket in self.days.values():
+            date = bucket.date
+            efficiency, uptime = bucket.efficiency(), bucket.uptime()
+            if efficiency is not None:
+                series["efficiency"].append({"date": date, "value": round(efficiency, 1)})
+            if uptime is not None:
+                series["uptime"].append({"date": date, "value": round(uptime, 1)})
+            series["maintenance"].append({"date": date, "value": bucket.maintenance})
+        return series
+
+fleet_aggregates = FleetAggregates(settings.DASHBOARD_TREND_DAYS)
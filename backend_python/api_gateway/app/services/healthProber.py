@@ -0,0 +1,115 @@
+# Background health prober for upstream microservices
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+from backend_python.api_gateway.app.services.upstreamPool import SERVICES, upstream_pool
+
+logger = setup_logger("api_gateway_health")
+
+class HealthProber:
+    """Checks all upstream services concurrently and caches the latest status per service"""
+
+    def __init__(self, pool, services: dict):
+        self.pool = pool
+        self.services = services
+        self.interval = settings.HEALTH_PROBE_INTERVAL
+        self.timeout = settings.HEALTH_CHECK_TIMEOUT
+        self.deadline = settings.HEALTH_CHECK_DEADLINE
+        self.history = {
+            name: deque(maxlen=settings.HEALTH_LATENCY_HISTORY) for name in services
+        }
+        self.status = {
+            name.lower(): {"status": "unknown", "response_time": None, "checked_at": None, "latency_history": []}
+            for name in services
+        }
+        self.checked_at = None
+        self.checked_monotonic = None
+        self.probes = 0
+        self._probe = None
+        self._task = None
+
+    async def check_service(self, service_name: str) -> dict:
+        """Probe one service's /health endpoint"""
+        started = time.perf_counter()
+        try:
+            response = await self.pool.request(service_name, "GET", "/health", timeout=self.timeout)
+            elapsed = time.perf_counter() - started
+            self.history[service_name].append(round(elapsed, 6))
+            return {
+                "status": "healthy" if response.status_code == 200 else "unhealthy",
+                "response_time": elapsed,
+            }
+        except Exception:
+            return {"status": "unreachable", "response_time": None}
+
+    async def check_all(self) -> dict:
+        """Probe every service concurrently, giving up on stragglers at the total deadline"""
+        tasks = {
+            name: asyncio.create_task(self.check_service(name)) for name in self.services
+        }
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+
+        checked_at = datetime.utcnow().isoformat()
+        for name, task in tasks.items():
+            result = task.result() if task in done else {"status": "unreachable", "response_time": None}
+            result["checked_at"] = checked_at
+            result["latency_history"] = list(self.history[name])
+            self.status[name.lower()] = result
+        self.checked_at = checked_at
+        self.checked_monotonic = time.monotonic()
+        return self.status
+
+    async def refresh(self, max_age: float = 0.0) -> dict:
+        """Probe now unless the cached status is younger than max_age; concurrent callers share one probe"""
+        if self.checked_monotonic is not None and time.monotonic() - self.checked_monotonic < max_age:
+            return self.status
+        if self._probe is None:
+            self.probes += 1
+            self._probe = asyncio.ensure_future(self.check_all())
+            self._probe.add_done_callback(self._probe_done)
+        return await asyncio.shield(self._probe)
+
+    def _probe_done(self, probe: asyncio.Future):
+        self._probe = None
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not probe.cancelled():
+            probe.exception()
+
+    def snapshot(self) -> dict:
+        """Cached status of all services from the last probe"""
+        overall_status = "healthy" if all(
+            s["status"] == "healthy" for s in self.status.values()
+        ) else "degraded"
+        return {"status": overall_status, "checked_at": self.checked_at, "services": self.status}
+
+    async def _run(self):
+        """Refresh the cached status on a fixed interval"""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Health probe error: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the background probe loop (called from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Health prober started - interval=%ss, deadline=%ss", self.interval, self.deadline)
+
+    async def stop(self):
+        """Stop the background probe loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+health_prober = HealthProber(upstream_pool, SERVICES)
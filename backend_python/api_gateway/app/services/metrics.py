@@ -0,0 +1,224 @@
+# In-process metrics (log-bucketed histograms, counters, gauges) rendered in Prometheus text format
+import bisect
+import math
+import threading
+import time
+
+def log_buckets(start: float, factor: float, count: int) -> list:
+    """Geometric bucket upper bounds: start, start*factor, ... (count bounds)"""
+    return [start * factor ** i for i in range(count)]
+
+# 0.25ms .. ~92s with 4 buckets per doubling of latency (about 19% relative error)
+LATENCY_BUCKETS = log_buckets(0.00025, 2 ** 0.25, 74)
+# 64B .. 64MB, one bucket per quadrupling
+SIZE_BUCKETS = log_buckets(64, 4, 11)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Metric:
+    """A metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.series = {}
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self) -> list:
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+            for labels, value in self.series.items()
+        ]
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time when a callback is given"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), callback=None):
+        super().__init__(name, help_text, label_names)
+        self.callback = callback
+
+    def set(self, value: float, labels: tuple = ()):
+        self.series[labels] = value
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.series[labels] = self.series.get(labels, 0) - amount
+
+    def render(self) -> list:
+        series = self.callback() if self.callback is not None else self.series
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+            for labels, value in series.items()
+        ]
+
+class Histogram(Metric):
+    """Fixed log-spaced buckets; observe() is one bisect and two additions"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), buckets: list = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.bounds = list(buckets)
+        self.bound_labels = [f'le="{bound:.6g}"' for bound in self.bounds] + ['le="+Inf"']
+
+    def observe(self, value: float, labels: tuple = ()):
+        state = self.series.get(labels)
+        if state is None:
+            # Per-bucket counts (last slot is +Inf), then sum
+            state = self.series[labels] = [[0] * (len(self.bounds) + 1), 0.0]
+        state[0][bisect.bisect_left(self.bounds, value)] += 1
+        state[1] += value
+
+    def quantile(self, q: float, labels: tuple = ()) -> float:
+        """Upper bound of the bucket holding the q-quantile (for quick checks, not for alerting)"""
+        state = self.series.get(labels)
+        if state is None:
+            return 0.0
+        counts = state[0]
+        rank = q * sum(counts)
+        seen = 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[i] if i < len(self.bounds) else math.inf
+        return 0.0
+
+    def render(self) -> list:
+        lines = self.header()
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for le, count in zip(self.bound_labels, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Named metric families, rendered together for /metrics"""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, label_names: tuple = ()) -> Counter:
+        return self.register(Counter(name, help_text, label_names))
+
+    def gauge(self, name: str, help_text: str, label_names: tuple = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, help_text, label_names, callback))
+
+    def histogram(self, name: str, help_text: str, label_names: tuple = (), buckets: list = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# Gateway request metrics
+http_requests = registry.counter("gateway_http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status"))
+http_latency = registry.histogram("gateway_http_request_duration_seconds", "HTTP request latency until the response completes", ("route", "method"))
+http_in_flight = registry.gauge("gateway_http_requests_in_flight", "HTTP requests currently being handled")
+http_request_size = registry.histogram("gateway_http_request_size_bytes", "HTTP request body size", ("route",), SIZE_BUCKETS)
+http_response_size = registry.histogram("gateway_http_response_size_bytes", "HTTP response body size", ("route",), SIZE_BUCKETS)
+
+# Upstream call metrics
+upstream_latency = registry.histogram(
+    "gateway_upstream_request_duration_seconds",
+    "Upstream call latency by service and outcome (ok, timeout, error, cancelled)",
+    ("service", "outcome"),
+)
+upstream_phases = registry.histogram(
+    "gateway_upstream_phase_duration_seconds",
+    "Upstream call time by phase: pool (waiting for a connection), connect, wait (request sent to response headers), read (body)",
+    ("service", "phase"),
+)
+upstream_responses = registry.counter(
+    "gateway_upstream_responses_total", "Upstream calls by service and status (HTTP status, or the outcome of a failed call)", ("service", "status")
+)
+
+# Event loop
+event_loop_lag = registry.histogram("gateway_event_loop_lag_seconds", "How late periodic event-loop wakeups run")
+
+class UpstreamTrace:
+    """httpx trace extension that timestamps httpcore events to split a call into phases"""
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+        self.started = time.perf_counter()
+        self.marks = {}
+
+    async def __call__(self, event_name: str, info: dict):
+        # "http11.send_request_headers.started" and "http2.send_request_headers.started" map to the same mark
+        prefix, _, event = event_name.partition(".")
+        self.marks[event if prefix in ("http11", "http2") else event_name] = time.perf_counter()
+
+    @property
+    def has_connection(self) -> bool:
+        """Whether the pool has handed this call a connection (new or reused)"""
+        return "connection.connect_tcp.started" in self.marks or "send_request_headers.started" in self.marks
+
+    @property
+    def opened_connection(self) -> bool:
+        return "connection.connect_tcp.complete" in self.marks
+
+    def _span(self, start: str, end: str, default_end: float = None) -> float:
+        started = self.marks.get(start)
+        finished = self.marks.get(end, default_end)
+        if started is None or finished is None:
+            return None
+        return max(0.0, finished - started)
+
+    def record(self, status_code: int = None, outcome: str = "ok"):
+        """Observe total latency and per-phase durations; call once the body is read or released, or the call failed"""
+        finished = time.perf_counter()
+        service = self.service_name.lower()
+        upstream_latency.observe(finished - self.started, (service, outcome))
+        upstream_responses.inc((service, str(status_code) if status_code is not None else outcome))
+
+        first = [self.marks[name] for name in ("connection.connect_tcp.started", "send_request_headers.started") if name in self.marks]
+        connected = "connection.start_tls.complete" if "connection.start_tls.complete" in self.marks else "connection.connect_tcp.complete"
+        phases = {
+            "pool": min(first) - self.started if first else None,
+            # A reused keep-alive connection has no connect phase
+            "connect": self._span("connection.connect_tcp.started", connected) or 0.0,
+            "wait": self._span("send_request_headers.started", "receive_response_headers.complete"),
+            "read": self._span("receive_response_headers.complete", "receive_response_body.complete", finished),
+        }
+        for phase, duration in phases.items():
+            if duration is not None:
+                upstream_phases.observe(duration, (service, phase))
@@ -1,5 +1,13 @@
 from datetime import datetime
 import random
+import time
+import numpy as np
+
+# Alert rules per sensor parameter: thresholds, clear hysteresis and minimum breach duration (seconds)
+SENSOR_THRESHOLDS = {
+    "motor_temperature": {"warning": 55, "critical": 70, "hysteresis": 2.0, "minDuration": 5},
+    "bearing_vibration": {"warning": 4.0, "critical": 6.0, "hysteresis": 0.3, "minDuration": 3},
+}
 
 class MockDataGenerator:
     def __init__(self):
@@ -18,24 +26,32 @@ class MockDataGenerator:
                 ]
             }
         ]
+        self.equipment_index = {eq["id"]: eq for eq in self.equipment_list}
+
+    def get_equipment(self, equipment_id: str):
+        return self.equipment_index.get(equipment_id)
+
+    def build_sensor_reading(self, equipment: dict, sensor: dict, timestamp: float, value: float):
+        return {
+            "id": f"{equipment['id']}-{sensor['parameter']}-{int(timestamp * 1000)}",
+            "equipmentId": equipment["id"],
+            "sensorType": sensor["type"],
+            "parameter": sensor["parameter"],
+            "value": value,
+            "unit": self.get_sensor_unit(sensor["parameter"]),
+            "timestamp": datetime.utcfromtimestamp(timestamp).isoformat(),
+            "status": "active",
+            "threshold": self.get_sensor_threshold(sensor["parameter"]),
+            "location": equipment["location"]
+        }
 
     def generate_sensor_data(self, equipment_id: str):
-        equipment = next((eq for eq in self.equipment_list if eq["id"] == equipment_id), None)
+        equipment = self.get_equipment(equipment_id)
         if not equipment:
             return []
+        now = time.time()
         return [
-            {
-                "id": f"{equipment_id}-{sensor['parameter']}-{int(datetime.utcnow().timestamp() * 1000)}",
-                "equipmentId": equipment_id,
-                "sensorType": sensor["type"],
-                "parameter": sensor["parameter"],
-                "value": self.generate_sensor_value(sensor["parameter"]),
-                "unit": self.get_sensor_unit(sensor["parameter"]),
-                "timestamp": datetime.utcnow().isoformat(),
-                "status": "active",
-                "threshold": self.get_sensor_threshold(sensor["parameter"]),
-                "location": equipment["location"]
-            }
+            self.build_sensor_reading(equipment, sensor, now, self.generate_sensor_value(sensor["parameter"]))
             for sensor in equipment["sensors"]
         ]
 
@@ -66,19 +82,8 @@ class MockDataGenerator:
             "modelVersion": "1.0.0"
         }]
 
-    def generate_dashboard_stats(self):
-        return {
-            "totalElevators": 247,
-            "activeAlerts": 23,
-            "averageEfficiency": 94.2,
-            "dailyTasks": 18,
-            "trends": {
-                "elevators": 12,
-                "alerts": 5,
-                "efficiency": 2.3,
-                "tasks": 15
-            }
-        }
+    def generate_efficiency(self):
+        return 90 + random.random() * 8
 
     def get_equipment_list(self):
         return self.equipment_list
@@ -91,6 +96,14 @@ class MockDataGenerator:
         }
         return values.get(parameter, 50)
 
+    def generate_sensor_values(self, parameter: str, count: int):
+        """Vectorized counterpart of generate_sensor_value for a batch of samples"""
+        if parameter == "motor_temperature":
+            return 45 + np.random.random(count) * 15
+        if parameter == "bearing_vibration":
+            return 2.5 + np.random.random(count) * 1.5
+        return np.full(count, 50.0)
+
     def get_sensor_unit(self, parameter: str):
         units = {
             "car_position": "m",
@@ -100,11 +113,10 @@ class MockDataGenerator:
         return units.get(parameter, "unit")
 
     def get_sensor_threshold(self, parameter: str):
-        thresholds = {
-            "motor_temperature": {"warning": 55, "critical": 70},
-            "bearing_vibration": {"warning": 4.0, "critical": 6.0}
-        }
-        return thresholds.get(parameter)
+        rule = SENSOR_THRESHOLDS.get(parameter)
+        if not rule:
+            return None
+        return {"warning": rule["warning"], "critical": rule["critical"]}
 
 # Usage example:
 # mock_data_generator = MockDataGenerator()
@@ -0,0 +1,171 @@
+# Micro-batching of prediction requests into one AI service call, with a short-TTL result cache
+import asyncio
+import time
+from collections import OrderedDict
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+from backend_python.api_gateway.app.services.upstreamPool import upstream_pool
+from backend_python.api_gateway.app.services.circuitBreaker import upstream_guard
+
+logger = setup_logger("api_gateway_predictions")
+
+BATCH_PATH = "/api/predictions/batch"
+
+class PredictionError(Exception):
+    """A single item of a prediction batch failed"""
+
+def mock_backend(generator):
+    """Backend answering from the mock data generator"""
+    async def predict(items: list) -> list:
+        return [
+            {**generator.generate_predictions(equipment_id)[0], "parameter": parameter}
+            for equipment_id, parameter in items
+        ]
+    return predict
+
+async def upstream_backend(items: list) -> list:
+    """One POST of all items to the AI service; each result is a prediction or an {"error": ...} item"""
+    body = {"items": [{"equipmentId": equipment_id, "parameter": parameter} for equipment_id, parameter in items]}
+    response = await upstream_guard.call("AI_SERVICE", lambda timeout: upstream_pool.request(
+        "AI_SERVICE", "POST", BATCH_PATH, json=body, timeout=timeout
+    ))
+    if response.status_code >= 400:
+        raise PredictionError(f"AI service returned {response.status_code}")
+    results = response.json().get("results", [])
+    if len(results) != len(items):
+        raise PredictionError(f"AI service returned {len(results)} results for {len(items)} items")
+    return [
+        PredictionError(result["error"]) if isinstance(result, dict) and "error" in result else result
+        for result in results
+    ]
+
+class PredictionBatcher:
+    """Collects predict() calls arriving within a window into one backend call
+
+    A batch is sent when the window since its first item elapses or when it
+    reaches max_batch items, whichever comes first. The backend returns one
+    result per item, and an item's result may be an exception; that fails only
+    its own caller. Identical pending requests share one item, and results
+    are cached for cache_ttl seconds under (equipment, parameter, modelVersion)
+    of the model version last reported by the backend.
+    """
+
+    def __init__(self, backend, window: float, max_batch: int, cache_ttl: float, cache_size: int):
+        self.backend = backend
+        self.window = window
+        self.max_batch = max_batch
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.model_version = None
+        self.pending = {}
+        self.timer = None
+        self.tasks = set()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def predict(self, equipment_id: str, parameter: str) -> dict:
+        """Prediction for one equipment parameter, from the cache or the next batch"""
+        key = (equipment_id, parameter, self.model_version)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return cached[1]
+        self.misses += 1
+
+        item = (equipment_id, parameter)
+        future = self.pending.get(item)
+        if future is None:
+            future = self.pending[item] = asyncio.get_running_loop().create_future()
+            if len(self.pending) >= self.max_batch:
+                self.flush()
+            elif self.timer is None:
+                self.timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return await asyncio.shield(future)
+
+    def flush(self):
+        """Send the pending items as one batch"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        task = asyncio.create_task(self._dispatch(batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _dispatch(self, batch: dict):
+        items = list(batch)
+        self.batches += 1
+        self.items += len(items)
+        try:
+            try:
+                results = await self.backend(items)
+            except Exception as e:
+                logger.error("Prediction batch of %s failed: %s", len(items), e)
+                self.errors += len(items)
+                for future in batch.values():
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            expires = time.monotonic() + self.cache_ttl
+            for item, result in zip(items, results):
+                future = batch[item]
+                if not isinstance(result, (dict, Exception)):
+                    result = PredictionError(f"Invalid prediction result: {type(result).__name__}")
+                if isinstance(result, Exception):
+                    self.errors += 1
+                    if not future.done():
+                        future.set_exception(result)
+                    continue
+                self.model_version = result.get("modelVersion", self.model_version)
+                self._store((*item, result.get("modelVersion")), expires, result)
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # Never leave a caller waiting, whatever went wrong above
+            for future in batch.values():
+                if not future.done():
+                    self.errors += 1
+                    future.set_exception(PredictionError("No prediction result for this item"))
+
+    def _store(self, key: tuple, expires: float, result: dict):
+        self.cache[key] = (expires, result)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def close(self):
+        """Send what is pending and wait for in-flight batches"""
+        self.flush()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "averageBatchSize": round(self.items / self.batches, 2) if self.batches else 0,
+            "errors": self.errors,
+            "cacheHits": self.hits,
+            "cacheMisses": self.misses,
+            "cacheSize": len(self.cache),
+            "modelVersion": self.model_version,
+        }
+
+def create_batcher(generator) -> PredictionBatcher:
+    """Batcher over the backend selected by PREDICTION_BACKEND ("mock" or "upstream")"""
+    backend = upstream_backend if settings.PREDICTION_BACKEND == "upstream" else mock_backend(generator)
+    return PredictionBatcher(
+        backend,
+        settings.PREDICTION_BATCH_WINDOW_MS / 1000,
+        settings.PREDICTION_BATCH_MAX,
+        settings.PREDICTION_CACHE_TTL,
+        settings.PREDICTION_CACHE_SIZE,
+    )
@@ -0,0 +1,179 @@
+# Token-bucket rate limiting per client IP, per user and per route, with an in-process or Redis backend
+import importlib.util
+import math
+import time
+from collections import OrderedDict
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+
+logger = setup_logger("api_gateway_ratelimit")
+
+def parse_limit(value: str) -> tuple:
+    """Parse "rate:burst" (tokens per second : bucket size); a bare rate uses it as the burst too"""
+    rate, _, burst = value.partition(":")
+    rate = float(rate)
+    burst = float(burst) if burst else rate
+    if rate <= 0 or burst < 1:
+        raise ValueError(f"Invalid rate limit: {value}")
+    return rate, burst
+
+def parse_route_limits(value: str) -> list:
+    """Parse "prefix=rate:burst,..." into (prefix, rate, burst), longest prefix first"""
+    limits = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        prefix, _, limit = item.strip().partition("=")
+        limits.append((prefix, *parse_limit(limit)))
+    return sorted(limits, key=lambda limit: len(limit[0]), reverse=True)
+
+class LocalBucketBackend:
+    """Token buckets in process memory; buckets idle the longest are evicted beyond max_keys"""
+
+    name = "local"
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+
+    async def acquire(self, buckets: list, now: float) -> float:
+        """Take one token from every (key, rate, burst) bucket, or none of them
+
+        Returns 0 when admitted, else the seconds until all buckets have a token.
+        """
+        levels = []
+        wait = 0.0
+        for key, rate, burst in buckets:
+            tokens, updated = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            levels.append(tokens)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / rate)
+        if wait:
+            return wait
+        for (key, rate, burst), tokens in zip(buckets, levels):
+            self.buckets[key] = (tokens - 1, now)
+            self.buckets.move_to_end(key)
+        while len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        return 0.0
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"keys": len(self.buckets)}
+
+# Same all-or-nothing acquire as LocalBucketBackend, atomically inside Redis
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', KEYS[i], 'tokens', levels[i] - 1, 'updated', now)
+    redis.call('EXPIRE', KEYS[i], math.ceil(burst / rate) + 1)
+end
+return '0'
+"""
+
+class RedisBucketBackend:
+    """Token buckets shared by every gateway worker through Redis"""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        import redis.asyncio as aioredis
+        self.client = aioredis.from_url(url)
+        self.script = self.client.register_script(ACQUIRE_SCRIPT)
+        self.errors = 0
+
+    async def acquire(self, buckets: list, now: float) -> float:
+        keys = [f"ratelimit:{key}" for key, _, _ in buckets]
+        args = [now]
+        for _, rate, burst in buckets:
+            args += [rate, burst]
+        try:
+            return float(await self.script(keys=keys, args=args))
+        except Exception as e:
+            # Fail open: an unavailable limiter must not take the gateway down with it
+            self.errors += 1
+            logger.error("Rate limit backend error: %s", e)
+            return 0.0
+
+    async def close(self):
+        await self.client.aclose()
+
+    def stats(self) -> dict:
+        return {"errors": self.errors}
+
+def create_backend(name: str):
+    """Bucket backend by name; falls back to the local backend when Redis is unavailable"""
+    if name == "redis":
+        if importlib.util.find_spec("redis") is not None:
+            return RedisBucketBackend(settings.RATE_LIMIT_REDIS_URL)
+        logger.warning("RATE_LIMIT_BACKEND=redis but the redis package is not installed; using local buckets")
+    return LocalBucketBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+class RateLimiter:
+    """Checks the IP, user and route buckets that apply to a request in one acquire"""
+
+    def __init__(self, backend, ip_limit: tuple, user_limit: tuple, route_limits: list):
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.user_limit = user_limit
+        self.route_limits = route_limits
+        self.allowed = 0
+        self.limited = 0
+
+    def buckets_for(self, client_ip: str, user: str, path: str) -> list:
+        """(key, rate, burst) buckets for a request; route buckets are per client and route prefix"""
+        buckets = [(f"ip:{client_ip}", *self.ip_limit)]
+        if user:
+            buckets.append((f"user:{user}", *self.user_limit))
+        for prefix, rate, burst in self.route_limits:
+            if path.startswith(prefix):
+                buckets.append((f"route:{prefix}:{user or client_ip}", rate, burst))
+                break
+        return buckets
+
+    async def check(self, client_ip: str, user: str, path: str) -> int:
+        """0 when the request may proceed, else the Retry-After in whole seconds"""
+        buckets = self.buckets_for(client_ip, user, path)
+        wait = await self.backend.acquire(buckets, time.time())
+        if not wait:
+            self.allowed += 1
+            return 0
+        self.limited += 1
+        return max(1, math.ceil(wait))
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            **self.backend.stats(),
+        }
+
+rate_limiter = RateLimiter(
+    create_backend(settings.RATE_LIMIT_BACKEND),
+    parse_limit(settings.RATE_LIMIT_PER_IP),
+    parse_limit(settings.RATE_LIMIT_PER_USER),
+    parse_route_limits(settings.RATE_LIMIT_ROUTES),
+)
@@ -0,0 +1,236 @@
+# Gateway response cache: pre-serialized, pre-compressed bodies with ETags and stale-while-revalidate
+import asyncio
+import functools
+import gzip
+import hashlib
+import inspect
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+from backend_python.api_gateway.app.services.responseEncoding import encode_json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = setup_logger("api_gateway_cache")
+
+class CachedResponse:
+    """One serialized response body with its compressed variants and a strong ETag per content-coding"""
+
+    def __init__(self, payload, ttl: float, stale_ttl: float):
+        self.body = encode_json(jsonable_encoder(payload))
+        self.digest = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self.encodings = {"gzip": gzip.compress(self.body, compresslevel=6)}
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(self.body, quality=5)
+        self.created = time.monotonic()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created
+
+    def is_fresh(self) -> bool:
+        return self.age < self.ttl
+
+    def is_usable(self) -> bool:
+        return self.age < self.ttl + self.stale_ttl
+
+    def etag(self, encoding: str = None) -> str:
+        """Strong validators must differ between representations, so each coding gets its own suffix"""
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+def accepted_encodings(accept_encoding: str) -> dict:
+    """q-value per content-coding in an Accept-Encoding header (RFC 7231 section 5.3.4)"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """Most preferred available coding with q > 0 (earlier in available wins ties), or None for identity"""
+    accepted = accepted_encodings(accept_encoding)
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 7232 section 3.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+class ResponseCache:
+    """Bounded LRU of cached responses keyed by route path, query string and user role"""
+
+    def __init__(self, enabled: bool = True, max_entries: int = 1000):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.refreshing = set()
+        self.evictions = 0
+        self.expired = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def key_for(request: Request) -> tuple:
+        user = getattr(request.state, "user", None) or {}
+        query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+        return (request.url.path, query, user.get("role", "anonymous"))
+
+    def get(self, key: tuple):
+        """Entry for a key while still usable (fresh or within its stale window), else None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if not entry.is_usable():
+            del self.entries[key]
+            self.expired += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, entry: CachedResponse):
+        """Store an entry, dropping expired entries and then the least recently used ones over the bound"""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            for expired_key in [k for k, cached in self.entries.items() if not cached.is_usable()]:
+                del self.entries[expired_key]
+                self.expired += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, prefix: str = None) -> int:
+        """Drop entries whose path starts with prefix (all entries when prefix is None)"""
+        keys = [key for key in self.entries if prefix is None or key[0].startswith(prefix)]
+        for key in keys:
+            del self.entries[key]
+        if keys:
+            logger.info("Invalidated %s cached responses for %s", len(keys), prefix or 'all routes')
+        return len(keys)
+
+    def respond(self, entry: CachedResponse, request: Request) -> Response:
+        """304 when the client already has the selected representation, else the best encoding it accepts"""
+        available = [encoding for encoding in ("br", "gzip") if encoding in entry.encodings]
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), available)
+        headers = {
+            "ETag": entry.etag(encoding),
+            "Cache-Control": f"private, max-age={int(entry.ttl)}",
+            "Vary": "Accept-Encoding, Authorization",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            return Response(entry.encodings[encoding], media_type="application/json", headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def _refresh(self, key: tuple, handler, args, kwargs, ttl: float, stale_ttl: float):
+        """Re-run a handler in the background to replace a stale entry"""
+        if key in self.refreshing:
+            return
+        self.refreshing.add(key)
+
+        async def refresh():
+            try:
+                payload = await handler(*args, **kwargs)
+                if self.cacheable(payload):
+                    self.put(key, CachedResponse(payload, ttl, stale_ttl))
+            except Exception as e:
+                logger.error("Background refresh failed for %s: %s", key[0], e)
+            finally:
+                self.refreshing.discard(key)
+
+        asyncio.create_task(refresh())
+
+    @staticmethod
+    def cacheable(payload) -> bool:
+        """Only successful JSON payloads are cached"""
+        if isinstance(payload, Response):
+            return False
+        return not (isinstance(payload, dict) and payload.get("success") is False)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "refreshing": len(self.refreshing),
+            "brotli": brotli is not None,
+        }
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_ENABLED, settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+def cached_response(ttl: float, stale_ttl: float = 0):
+    """Serve a GET route from the response cache; stale entries are returned while a background refresh runs"""
+    def decorator(handler):
+        signature = inspect.signature(handler)
+        needs_request = "request" not in signature.parameters
+
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            request = kwargs["request"] if not needs_request else kwargs.pop("cache_request")
+            if not response_cache.enabled:
+                return await handler(*args, **kwargs)
+
+            key = response_cache.key_for(request)
+            entry = response_cache.get(key)
+            if entry is not None and entry.is_fresh():
+                response_cache.hits += 1
+                return response_cache.respond(entry, request)
+            if entry is not None and entry.is_usable():
+                response_cache.stale_hits += 1
+                response_cache._refresh(key, handler, args, kwargs, ttl, stale_ttl)
+                return response_cache.respond(entry, request)
+
+            response_cache.misses += 1
+            payload = await handler(*args, **kwargs)
+            if not response_cache.cacheable(payload):
+                return payload
+            entry = CachedResponse(payload, ttl, stale_ttl)
+            response_cache.put(key, entry)
+            return response_cache.respond(entry, request)
+
+        # Expose the Request to FastAPI's dependency injection without changing the handler
+        if needs_request:
+            parameters = list(signature.parameters.values()) + [
+                inspect.Parameter("cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            ]
+            wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+    return decorator
@@ -0,0 +1,113 @@
+# Content negotiation and encoders for bulk responses: JSON (orjson when available), columnar JSON, MessagePack, Arrow IPC
+import importlib.util
+import json
+import numpy as np
+from fastapi import HTTPException, Request, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# pyarrow takes tens of milliseconds to import, so it is only loaded with the first Arrow response
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.columnar+json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+ACCEPT_ALIASES = {
+    "application/x-msgpack": "msgpack",
+    "application/vnd.apache.arrow.file": "arrow",
+}
+
+def available_formats() -> list:
+    """Formats whose encoder is installed"""
+    missing = {"msgpack": msgpack is None, "arrow": not ARROW_AVAILABLE}
+    return [fmt for fmt in MEDIA_TYPES if not missing.get(fmt)]
+
+def negotiate_format(request: Request, requested: str = None) -> str:
+    """Pick a response format from ?format= or, failing that, the first supported Accept media type"""
+    if requested is None:
+        requested = "json"
+        formats = {media_type: fmt for fmt, media_type in MEDIA_TYPES.items()}
+        formats.update(ACCEPT_ALIASES)
+        for media_range in request.headers.get("accept", "").split(","):
+            fmt = formats.get(media_range.split(";")[0].strip().lower())
+            if fmt is not None:
+                requested = fmt
+                break
+    if requested not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {requested}")
+    if requested not in available_formats():
+        raise HTTPException(status_code=406, detail=f"{requested} encoding is not available on this gateway")
+    return requested
+
+def epoch_ms(timestamps: np.ndarray) -> np.ndarray:
+    """Epoch seconds to integer epoch milliseconds"""
+    return np.round(np.asarray(timestamps, dtype=np.float64) * 1000).astype(np.int64)
+
+def round_column(values: np.ndarray, digits: int = 4) -> np.ndarray:
+    """Trim float32 noise from a float column; other dtypes pass through"""
+    if np.issubdtype(values.dtype, np.floating):
+        return np.round(values.astype(np.float64), digits)
+    return values
+
+def _default(obj):
+    """Fallback for types the JSON/MessagePack encoders do not handle natively"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+def encode_json(payload) -> bytes:
+    """Compact JSON; NumPy arrays are serialized natively by orjson"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+def encode_msgpack(payload) -> bytes:
+    return msgpack.packb(payload, default=_default)
+
+def encode_arrow(columns: dict, metadata: dict) -> bytes:
+    """One record batch of parallel columns for all parameters, with a dictionary-encoded parameter column"""
+    parameters = [name for name, column_set in columns.items() if column_set]
+    lengths = [len(next(iter(columns[name].values()))) for name in parameters]
+    names = list(columns[parameters[0]]) if parameters else []
+
+    pa = importlib.import_module("pyarrow")
+    arrays = [pa.DictionaryArray.from_arrays(
+        pa.array(np.repeat(np.arange(len(parameters), dtype=np.int32), lengths)),
+        pa.array(parameters, type=pa.string()),
+    )]
+    for name in names:
+        arrays.append(pa.array(np.concatenate([columns[parameter][name] for parameter in parameters])))
+    batch = pa.RecordBatch.from_arrays(arrays, names=["parameter"] + names)
+    batch = batch.replace_schema_metadata({"metadata": encode_json(metadata)})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+def encode_response(fmt: str, payload, arrow_columns: dict = None, arrow_metadata: dict = None) -> Response:
+    """Encode a response envelope in the negotiated format
+
+    Arrow responses carry arrow_columns as the record batch and the rest of
+    the envelope as schema metadata.
+    """
+    if fmt == "msgpack":
+        body = encode_msgpack(payload)
+    elif fmt == "arrow":
+        body = encode_arrow(arrow_columns, arrow_metadata)
+    else:
+        body = encode_json(payload)
+    return Response(body, media_type=MEDIA_TYPES[fmt], headers={"Vary": "Accept"})
@@ -0,0 +1,120 @@
+# Vectorized bucketed aggregation and LTTB downsampling over the sensor store
+import numpy as np
+
+SUPPORTED_AGGREGATIONS = ("min", "max", "mean", "p95", "count")
+
+def _group(bucket_ids: np.ndarray):
+    """Start offsets of runs of equal bucket ids in a sorted array"""
+    return np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+
+def aggregate_raw(timestamps: np.ndarray, values: np.ndarray, width: float, aggregations) -> dict:
+    """Bucket raw samples by `width` seconds and compute the requested aggregations"""
+    if not len(timestamps):
+        return {"buckets": np.empty(0), **{agg: np.empty(0) for agg in aggregations}}
+    bucket_starts = np.floor(timestamps / width) * width
+    first_index = _group(bucket_starts)
+    counts = np.diff(np.r_[first_index, len(values)])
+
+    result = {"buckets": bucket_starts[first_index]}
+    if "min" in aggregations:
+        result["min"] = np.minimum.reduceat(values, first_index)
+    if "max" in aggregations:
+        result["max"] = np.maximum.reduceat(values, first_index)
+    if "mean" in aggregations:
+        result["mean"] = np.add.reduceat(values.astype(np.float64), first_index) / counts
+    if "count" in aggregations:
+        result["count"] = counts
+    if "p95" in aggregations:
+        # Sort values within each bucket at once, then pick the nearest-rank element per bucket
+        bucket_ids = np.repeat(np.arange(len(first_index)), counts)
+        ordered = values[np.lexsort((values, bucket_ids))]
+        ranks = np.ceil(0.95 * counts).astype(np.int64) - 1
+        result["p95"] = ordered[first_index + ranks]
+    return result
+
+def aggregate_rollup(columns: dict, width: float, aggregations) -> dict:
+    """Re-bucket rollup tier buckets into coarser `width` buckets"""
+    starts = columns["starts"]
+    if not len(starts):
+        return {"buckets": np.empty(0), **{agg: np.empty(0) for agg in aggregations}}
+    bucket_starts = np.floor(starts / width) * width
+    first_index = _group(bucket_starts)
+    counts = np.add.reduceat(columns["counts"].astype(np.int64), first_index)
+
+    result = {"buckets": bucket_starts[first_index]}
+    if "min" in aggregations:
+        result["min"] = np.minimum.reduceat(columns["mins"], first_index)
+    if "max" in aggregations:
+        result["max"] = np.maximum.reduceat(columns["maxs"], first_index)
+    if "mean" in aggregations:
+        result["mean"] = np.add.reduceat(columns["sums"], first_index) / counts
+    if "count" in aggregations:
+        result["count"] = counts
+    if "p95" in aggregations:
+        result["p95"] = np.add.reduceat(columns["p95_sums"], first_index) / counts
+    return result
+
+def select_rollup(series, width: float):
+    """Coarsest rollup tier whose bucket width divides `width` evenly, or None"""
+    dividing = [
+        tier for tier in series.rollups
+        if tier.width <= width and width % tier.width == 0
+    ]
+    return dividing[-1] if dividing else None
+
+def aggregate_series(series, start: float, end: float, width: float, aggregations) -> dict:
+    """Aggregate one series over [start, end]; widths covered by a rollup tier never scan raw samples"""
+    tier = select_rollup(series, width)
+    if tier is not None:
+        columns = tier.range(start, end)
+        result = aggregate_rollup(columns, width, aggregations)
+        source = tier.name
+    else:
+        timestamps, values = series.buffer.range(start, end)
+        result = aggregate_raw(timestamps, values, width, aggregations)
+        source = "raw"
+    return {"source": source, **result}
+
+def lttb(timestamps: np.ndarray, values: np.ndarray, threshold: int):
+    """Largest-Triangle-Three-Buckets downsampling to `threshold` points"""
+    count = len(timestamps)
+    if threshold >= count or threshold < 3:
+        return timestamps, values
+
+    x = timestamps.astype(np.float64)
+    y = values.astype(np.float64)
+    # Bucket edges for the points between the fixed first and last samples
+    edges = np.floor(np.linspace(1, count - 1, threshold - 1)).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else count
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        # Triangle areas between the previous selected point, each candidate and the next bucket average
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (avg_y - y[previous])
+        )
+        previous = lo + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return timestamps[selected], values[selected]
+
+def downsample_series(series, start: float, end: float, threshold: int) -> dict:
+    """LTTB over raw samples, or over 1-minute rollup means once the range predates raw retention"""
+    if start is not None and start < series.buffer.first_timestamp:
+        tier = series.rollups[0]
+        columns = tier.range(start, end)
+        timestamps = columns["starts"]
+        values = columns["sums"] / np.maximum(columns["counts"], 1)
+        source = tier.name
+    else:
+        timestamps, values = series.buffer.range(start, end)
+        source = "raw"
+    timestamps, values = lttb(timestamps, values, threshold)
+    return {"source": source, "timestamps": timestamps, "values": values}
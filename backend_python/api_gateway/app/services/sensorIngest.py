@@ -0,0 +1,358 @@
+# Sensor reading ingestion: vectorized parsing/validation, bounded queue and write-behind SQLite persistence
+import asyncio
+import functools
+import json
+import sqlite3
+import struct
+import time
+from collections import deque
+import numpy as np
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+from backend_python.api_gateway.app.services.metrics import registry
+from backend_python.api_gateway.app.services.sensorStore import sensor_store
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = setup_logger("api_gateway_ingest")
+
+ingest_readings = registry.counter("gateway_ingest_readings_total", "Ingested sensor readings by outcome", ("outcome",))
+
+# Binary frame: magic, u16 series count, per series (u8 length + equipment ID, u8 length + parameter),
+# u32 record count, then packed little-endian records of (u16 series index, f8 epoch ms, f4 value)
+FRAME_MAGIC = b"SNS1"
+RECORD_DTYPE = np.dtype([("series", "<u2"), ("timestamp", "<f8"), ("value", "<f4")])
+
+class IngestError(ValueError):
+    """Payload that cannot be parsed at all"""
+
+class QueueFullError(Exception):
+    """Write-behind queue has no room for the batch"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Ingest queue is full")
+        self.retry_after = retry_after
+
+class ReadingBatch:
+    """Readings as parallel columns; series holds the distinct (equipment_id, parameter) pairs"""
+
+    def __init__(self, series: list, series_index: np.ndarray, timestamps: np.ndarray, values: np.ndarray):
+        self.series = series
+        self.series_index = series_index
+        self.timestamps = timestamps
+        self.values = values
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def select(self, mask: np.ndarray) -> "ReadingBatch":
+        return ReadingBatch(self.series, self.series_index[mask], self.timestamps[mask], self.values[mask])
+
+def _floats(items: list) -> np.ndarray:
+    """Float column; missing or non-numeric items become NaN so validation rejects them"""
+    try:
+        return np.array(items, dtype=np.float64)
+    except (TypeError, ValueError):
+        column = np.full(len(items), np.nan)
+        for i, item in enumerate(items):
+            try:
+                column[i] = float(item)
+            except (TypeError, ValueError):
+                pass
+        return column
+
+def parse_ndjson(body: bytes) -> ReadingBatch:
+    """One {"equipmentId", "parameter", "timestamp" (epoch ms), "value"} object per line, parsed in a single pass"""
+    lines = [line for line in body.split(b"\n") if line.strip()]
+    document = b"[" + b",".join(lines) + b"]"
+    try:
+        records = orjson.loads(document) if orjson is not None else json.loads(document)
+    except ValueError as e:
+        raise IngestError(f"Invalid NDJSON: {e}")
+    if not all(isinstance(record, dict) for record in records):
+        raise IngestError("Each NDJSON line must be an object")
+
+    pairs = [(record.get("equipmentId"), record.get("parameter")) for record in records]
+    for line, (equipment_id, parameter) in enumerate(pairs, 1):
+        if not isinstance(equipment_id, str) or not isinstance(parameter, str):
+            raise IngestError(f"Line {line}: equipmentId and parameter must be strings")
+    series = list(dict.fromkeys(pairs))
+    positions = {pair: i for i, pair in enumerate(series)}
+    return ReadingBatch(
+        series,
+        np.array([positions[pair] for pair in pairs], dtype=np.int64),
+        _floats([record.get("timestamp") for record in records]) / 1000,
+        _floats([record.get("value") for record in records]).astype(np.float32),
+    )
+
+def parse_frame(body: bytes) -> ReadingBatch:
+    """Decode a binary frame; records are read with one np.frombuffer"""
+    try:
+        if body[:4] != FRAME_MAGIC:
+            raise IngestError("Binary frame must start with SNS1")
+        (series_count,) = struct.unpack_from("<H", body, 4)
+        offset = 6
+        series = []
+        for _ in range(series_count):
+            names = []
+            for _ in range(2):
+                length = body[offset]
+                names.append(body[offset + 1:offset + 1 + length].decode())
+                offset += 1 + length
+            series.append(tuple(names))
+        (count,) = struct.unpack_from("<I", body, offset)
+        offset += 4
+        records = np.frombuffer(body, dtype=RECORD_DTYPE, count=count, offset=offset)
+    except (IndexError, struct.error, UnicodeDecodeError, ValueError) as e:
+        if isinstance(e, IngestError):
+            raise
+        raise IngestError(f"Malformed binary frame: {e}")
+    series_index = records["series"].astype(np.int64)
+    if count and series_index.max() >= series_count:
+        raise IngestError("Record references an undeclared series")
+    return ReadingBatch(series, series_index, records["timestamp"] / 1000, records["value"].astype(np.float32))
+
+def encode_frame(series: list, series_index, timestamps_ms, values) -> bytes:
+    """Build a binary frame (for clients and benchmarks)"""
+    header = [FRAME_MAGIC, struct.pack("<H", len(series))]
+    for equipment_id, parameter in series:
+        for name in (equipment_id.encode(), parameter.encode()):
+            header.append(struct.pack("<B", len(name)) + name)
+    records = np.empty(len(timestamps_ms), dtype=RECORD_DTYPE)
+    records["series"] = series_index
+    records["timestamp"] = timestamps_ms
+    records["value"] = values
+    return b"".join(header) + struct.pack("<I", len(records)) + records.tobytes()
+
+def validate(batch: ReadingBatch, store, now: float) -> np.ndarray:
+    """Mask of valid readings: series known to the store, finite value, timestamp within the accepted window"""
+    # One index lookup per distinct series in the batch, not per reading
+    series_known = np.array([store.get_series(*pair) is not None for pair in batch.series], dtype=bool)
+    with np.errstate(invalid="ignore"):
+        return (
+            series_known[batch.series_index]
+            & np.isfinite(batch.values)
+            & (batch.timestamps >= now - settings.INGEST_MAX_AGE_SECONDS)
+            & (batch.timestamps <= now + settings.INGEST_MAX_SKEW_SECONDS)
+        )
+
+def sqlite_path(database_url: str):
+    """File path of a sqlite:/// URL, or None for other databases"""
+    prefix = "sqlite:///"
+    return database_url[len(prefix):] if database_url.startswith(prefix) else None
+
+class SensorIngestor:
+    """Feeds accepted readings to the sensor store at once and persists them in large write-behind transactions"""
+
+    def __init__(self, store, db_path: str, max_pending: int, flush_interval: float, max_batch: int):
+        self.store = store
+        self.db_path = db_path
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.pending = deque()
+        self.pending_readings = 0
+        self.series_ids = {}
+        self.connection = None
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.write_rate = 0.0
+        self._wakeup = None
+        self._stopping = None
+        self._flush_lock = None
+        self._writing = None
+        self._task = None
+
+    def submit(self, batch: ReadingBatch) -> dict:
+        """Validate, apply to the store and queue for persistence; raises QueueFullError when there is no room"""
+        valid = validate(batch, self.store, time.time())
+        accepted = batch.select(valid)
+        if self.pending_readings + len(accepted) > self.max_pending:
+            # Estimate how long the writer needs to make room
+            retry_after = max(1, int(self.pending_readings / self.write_rate)) if self.write_rate else 1
+            ingest_readings.inc(("throttled",), len(batch))
+            raise QueueFullError(retry_after)
+
+        # Samples per series in time order; the store drops any older than what it already holds
+        order = np.lexsort((accepted.timestamps, accepted.series_index))
+        index = accepted.series_index[order]
+        starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]]) if len(index) else []
+        for start, end in zip(starts, list(starts[1:]) + [len(index)]):
+            equipment_id, parameter = accepted.series[index[start]]
+            self.store.extend(equipment_id, parameter, accepted.timestamps[order[start:end]], accepted.values[order[start:end]])
+
+        if len(accepted):
+            self.pending.append(accepted)
+            self.pending_readings += len(accepted)
+            if self._wakeup is not None and self.pending_readings >= self.max_batch:
+                self._wakeup.set()
+        rejected = len(batch) - len(accepted)
+        self.accepted += len(accepted)
+        self.rejected += rejected
+        ingest_readings.inc(("accepted",), len(accepted))
+        ingest_readings.inc(("rejected",), rejected)
+        return {
+            "accepted": len(accepted),
+            "rejected": rejected,
+            "rejectedIndexes": np.flatnonzero(~valid)[:20].tolist(),
+            "queued": self.pending_readings,
+        }
+
+    def _open(self):
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sensor_series ("
+            "id INTEGER PRIMARY KEY, equipment_id TEXT NOT NULL, parameter TEXT NOT NULL, "
+            "UNIQUE (equipment_id, parameter))"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sensor_readings ("
+            "series_id INTEGER NOT NULL, timestamp_ms INTEGER NOT NULL, value REAL NOT NULL)"
+        )
+        for series_id, equipment_id, parameter in connection.execute("SELECT id, equipment_id, parameter FROM sensor_series"):
+            self.series_ids[(equipment_id, parameter)] = series_id
+        return connection
+
+    def _series_id(self, pair: tuple) -> int:
+        series_id = self.series_ids.get(pair)
+        if series_id is None:
+            self.connection.execute("INSERT OR IGNORE INTO sensor_series (equipment_id, parameter) VALUES (?, ?)", pair)
+            series_id = self.connection.execute(
+                "SELECT id FROM sensor_series WHERE equipment_id = ? AND parameter = ?", pair
+            ).fetchone()[0]
+            self.series_ids[pair] = series_id
+        return series_id
+
+    def _write(self, batches: list) -> int:
+        """One transaction with one executemany per batch (runs in a worker thread)"""
+        count = 0
+        self.connection.execute("BEGIN")
+        try:
+            for batch in batches:
+                # Only series that still have readings after validation get a sensor_series row
+                lookup = np.zeros(len(batch.series), dtype=np.int64)
+                for position in np.unique(batch.series_index).tolist():
+                    lookup[position] = self._series_id(batch.series[position])
+                ids = lookup[batch.series_index]
+                timestamps = np.round(batch.timestamps * 1000).astype(np.int64)
+                self.connection.executemany(
+                    "INSERT INTO sensor_readings (series_id, timestamp_ms, value) VALUES (?, ?, ?)",
+                    zip(ids.tolist(), timestamps.tolist(), batch.values.astype(np.float64).tolist()),
+                )
+                count += len(batch)
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+        return count
+
+    def _take(self) -> list:
+        """Pending batches up to max_batch readings (at least one batch)"""
+        batches, count = [], 0
+        while self.pending and (not batches or count + len(self.pending[0]) <= self.max_batch):
+            batch = self.pending.popleft()
+            batches.append(batch)
+            count += len(batch)
+        return batches
+
+    def _written(self, batches: list, count: int, started: float, write: asyncio.Future):
+        """Account for a finished write, or requeue its readings so the next flush retries them"""
+        self._writing = None
+        if write.cancelled() or write.exception() is not None:
+            self.pending.extendleft(reversed(batches))
+            return
+        self.pending_readings -= count
+        self.written += count
+        self.write_rate = count / max(time.perf_counter() - started, 1e-6)
+
+    async def flush(self):
+        """Persist everything pending; one write at a time, and a started write always runs to completion"""
+        async with self._flush_lock:
+            if self._writing is not None:
+                # A write abandoned by a cancelled flush is still using the connection
+                await asyncio.wait([self._writing])
+            while self.pending:
+                batches = self._take()
+                count = sum(len(batch) for batch in batches)
+                started = time.perf_counter()
+                if self.connection is None:
+                    self.pending_readings -= count
+                    self.written += count
+                    continue
+                write = self._writing = asyncio.ensure_future(asyncio.to_thread(self._write, batches))
+                write.add_done_callback(functools.partial(self._written, batches, count, started))
+                # Shielded: cancelling the flush must not orphan a transaction mid-way
+                await asyncio.shield(write)
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Ingest write failed, %s readings queued for retry: %s", self.pending_readings, e)
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def start(self):
+        if self._task is not None:
+            return
+        if self.db_path:
+            self.connection = await asyncio.to_thread(self._open)
+            logger.info("Sensor ingest persisting to %s (WAL)", self.db_path)
+        else:
+            logger.warning("DATABASE_URL is not SQLite; ingested readings are kept in memory only")
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer after persisting what is still queued"""
+        if self._task is None:
+            return
+        # Let the loop finish its current write instead of cancelling it mid-transaction
+        self._stopping.set()
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.error("Dropping %s unpersisted readings on shutdown", self.pending_readings)
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def stats(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "queued": self.pending_readings,
+            "max_queued": self.max_pending,
+            "write_rate": self.write_rate,
+            "persistent": self.connection is not None,
+        }
+
+sensor_ingestor = SensorIngestor(
+    sensor_store,
+    sqlite_path(settings.DATABASE_URL),
+    settings.INGEST_QUEUE_MAX_READINGS,
+    settings.INGEST_FLUSH_INTERVAL,
+    settings.INGEST_MAX_BATCH,
+)
@@ -0,0 +1,91 @@
+# Background feed of mock sensor samples into the sensor store
+import asyncio
+import time
+import numpy as np
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+
+logger = setup_logger("api_gateway_simulator")
+
+class SensorSimulator:
+    """Generates samples at each sensor's samplingRate and appends them to the store in batches"""
+
+    def __init__(self, generator, store, alert_engine=None, hub=None, aggregates=None):
+        self.generator = generator
+        self.store = store
+        self.alert_engine = alert_engine
+        self.hub = hub
+        self.aggregates = aggregates
+        self.last_predictions = 0.0
+        self.interval = settings.SENSOR_UPDATE_INTERVAL / 1000
+        self.last_tick = None
+        self._task = None
+
+    def tick(self, start: float, end: float):
+        """Write the samples every sensor would have produced in (start, end], then evaluate alerts"""
+        engine = self.alert_engine
+        readings = engine.empty_batch() if engine is not None else None
+        for equipment in self.generator.get_equipment_list():
+            for sensor in equipment["sensors"]:
+                count = max(1, int(round((end - start) * sensor.get("samplingRate", 1))))
+                timestamps = end - (end - start) * np.arange(count - 1, -1, -1) / count
+                values = self.generator.generate_sensor_values(sensor["parameter"], count)
+                self.store.extend(equipment["id"], sensor["parameter"], timestamps, values)
+
+                column = engine.columns.get(sensor["parameter"]) if engine is not None else None
+                if column is not None:
+                    readings[engine.rows[equipment["id"]], column] = values[-1]
+            if self.hub is not None:
+                self.publish(equipment, end)
+            if self.aggregates is not None:
+                self.aggregates.record_efficiency(equipment["id"], self.generator.generate_efficiency(), end)
+        if engine is not None:
+            engine.evaluate(readings, end)
+        if end - self.last_predictions >= settings.TELEMETRY_PREDICTION_INTERVAL:
+            self.last_predictions = end
+        self.last_tick = end
+
+    def publish(self, equipment: dict, now: float):
+        """Push latest readings (and periodically predictions) to live subscribers"""
+        equipment_id = equipment["id"]
+        if self.hub.has_subscribers("readings", equipment_id):
+            latest = self.store.latest(equipment_id)
+            self.hub.publish("readings", equipment_id, [
+                self.generator.build_sensor_reading(equipment, sensor, *latest[sensor["parameter"]])
+                for sensor in equipment["sensors"] if latest.get(sensor["parameter"])
+            ])
+        predictions_due = now - self.last_predictions >= settings.TELEMETRY_PREDICTION_INTERVAL
+        if predictions_due and self.hub.has_subscribers("predictions", equipment_id):
+            self.hub.publish("predictions", equipment_id, self.generator.generate_predictions(equipment_id))
+
+    async def _run(self):
+        """Tick on SENSOR_UPDATE_INTERVAL"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                now = time.time()
+                self.tick(self.last_tick, now)
+            except Exception as e:
+                logger.error("Sensor simulation error: %s", e)
+
+    def start(self):
+        """Register equipment, seed one sample per sensor and start ticking"""
+        for equipment in self.generator.get_equipment_list():
+            self.store.register_equipment(equipment)
+        if self.alert_engine is not None:
+            self.alert_engine.register(eq["id"] for eq in self.generator.get_equipment_list())
+        now = time.time()
+        self.tick(now - 1 / 1000, now)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Sensor simulator started - interval=%ss, store=%s", self.interval, self.store.stats())
+
+    async def stop(self):
+        """Stop ticking"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,329 @@
+# In-process time-series store for sensor readings
+import numpy as np
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+
+logger = setup_logger("api_gateway_sensor_store")
+
+class RingBuffer:
+    """Fixed-size ring of (timestamp, value) samples kept in time order
+
+    Timestamps are epoch seconds (float64), values float32, so a buffer costs
+    12 bytes per slot regardless of how many samples have been written.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.head = 0
+        self.size = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes
+
+    @property
+    def last_timestamp(self) -> float:
+        return self.timestamps[self.head - 1] if self.size else float("-inf")
+
+    def append(self, timestamp: float, value: float) -> bool:
+        """O(1) append; samples older than the newest stored one are dropped"""
+        if timestamp < self.last_timestamp:
+            return False
+        self.timestamps[self.head] = timestamp
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+    @property
+    def first_timestamp(self) -> float:
+        if not self.size:
+            return float("inf")
+        return self.timestamps[0] if self.size < self.capacity else self.timestamps[self.head]
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray):
+        """Vectorized append of a batch; returns the accepted samples in time order"""
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = np.asarray(timestamps, dtype=np.float64)[order]
+        values = np.asarray(values, dtype=np.float32)[order]
+        keep = timestamps >= self.last_timestamp
+        accepted = timestamps[keep], values[keep]
+
+        timestamps, values = accepted
+        if len(timestamps) > self.capacity:
+            timestamps, values = timestamps[-self.capacity:], values[-self.capacity:]
+        written = len(timestamps)
+        if not written:
+            return accepted
+
+        # Write in at most two slices: up to the end of the array, then wrap to the start
+        first = min(written, self.capacity - self.head)
+        self.timestamps[self.head:self.head + first] = timestamps[:first]
+        self.values[self.head:self.head + first] = values[:first]
+        rest = written - first
+        if rest:
+            self.timestamps[:rest] = timestamps[first:]
+            self.values[:rest] = values[first:]
+        self.head = (self.head + written) % self.capacity
+        self.size = min(self.size + written, self.capacity)
+        return accepted
+
+    def _segments(self):
+        """Stored samples as (older, newer) slices, each sorted by time"""
+        if self.size < self.capacity:
+            return [slice(0, self.size)]
+        return [slice(self.head, self.capacity), slice(0, self.head)]
+
+    def range(self, start: float = None, end: float = None, limit: int = None):
+        """Samples with start <= timestamp <= end, newest `limit` if given, via binary search"""
+        ts_parts, value_parts = [], []
+        for segment in self._segments():
+            timestamps = self.timestamps[segment]
+            lo = 0 if start is None else np.searchsorted(timestamps, start, side="left")
+            hi = len(timestamps) if end is None else np.searchsorted(timestamps, end, side="right")
+            if hi > lo:
+                ts_parts.append(timestamps[lo:hi])
+                value_parts.append(self.values[segment][lo:hi])
+
+        if not ts_parts:
+            return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float32)
+        timestamps = np.concatenate(ts_parts)
+        values = np.concatenate(value_parts)
+        if limit is not None and len(timestamps) > limit:
+            timestamps, values = timestamps[-limit:], values[-limit:]
+        return timestamps, values
+
+    def latest(self):
+        """Most recent (timestamp, value), or None when empty"""
+        if not self.size:
+            return None
+        index = self.head - 1
+        return float(self.timestamps[index]), float(self.values[index])
+
+class RollupTier:
+    """Fixed-width time buckets of min/max/sum/count, updated incrementally as samples arrive
+
+    p95 is approximated per bucket as the count-weighted mean of the p95 of
+    each appended batch, since exact percentiles cannot be merged.
+    """
+
+    def __init__(self, name: str, width: float, capacity: int):
+        self.name = name
+        self.width = width
+        self.capacity = capacity
+        self.starts = np.zeros(capacity, dtype=np.float64)
+        self.mins = np.zeros(capacity, dtype=np.float32)
+        self.maxs = np.zeros(capacity, dtype=np.float32)
+        self.sums = np.zeros(capacity, dtype=np.float64)
+        self.counts = np.zeros(capacity, dtype=np.uint32)
+        self.p95_sums = np.zeros(capacity, dtype=np.float64)
+        self.head = 0
+        self.size = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.starts, self.mins, self.maxs, self.sums, self.counts, self.p95_sums))
+
+    @property
+    def first_start(self) -> float:
+        if not self.size:
+            return float("inf")
+        return self.starts[0] if self.size < self.capacity else self.starts[self.head]
+
+    def fold(self, summary: dict):
+        """Merge pre-aggregated groups (see summarize) into the open bucket and any new buckets"""
+        if not len(summary["starts"]):
+            return
+        if self.width != summary["width"]:
+            summary = resummarize(summary, self.width)
+
+        for i, start in enumerate(summary["starts"]):
+            last = self.head - 1
+            if self.size and self.starts[last] == start:
+                self.mins[last] = min(self.mins[last], summary["mins"][i])
+                self.maxs[last] = max(self.maxs[last], summary["maxs"][i])
+            elif self.size and start < self.starts[last]:
+                continue
+            else:
+                last = self.head
+                self.starts[last] = start
+                self.mins[last] = summary["mins"][i]
+                self.maxs[last] = summary["maxs"][i]
+                self.sums[last] = self.counts[last] = self.p95_sums[last] = 0
+                self.head = (self.head + 1) % self.capacity
+                self.size = min(self.size + 1, self.capacity)
+            self.sums[last] += summary["sums"][i]
+            self.counts[last] += summary["counts"][i]
+            self.p95_sums[last] += summary["p95_sums"][i]
+
+    def range(self, start: float = None, end: float = None) -> dict:
+        """Buckets whose start falls in [start, end], as column arrays"""
+        if self.size < self.capacity:
+            segments = [slice(0, self.size)]
+        else:
+            segments = [slice(self.head, self.capacity), slice(0, self.head)]
+        columns = {"starts": [], "mins": [], "maxs": [], "sums": [], "counts": [], "p95_sums": []}
+        for segment in segments:
+            starts = self.starts[segment]
+            lo = 0 if start is None else np.searchsorted(starts, np.floor(start / self.width) * self.width, side="left")
+            hi = len(starts) if end is None else np.searchsorted(starts, end, side="right")
+            for key in columns:
+                columns[key].append(getattr(self, key)[segment][lo:hi])
+        return {key: np.concatenate(parts) for key, parts in columns.items()}
+
+def summarize(timestamps: np.ndarray, values: np.ndarray, width: float) -> dict:
+    """Group a time-ordered batch into `width` buckets of min/max/sum/count/p95-weighted sums"""
+    bucket_starts = np.floor(timestamps / width) * width
+    first_index = np.flatnonzero(np.r_[True, bucket_starts[1:] != bucket_starts[:-1]])
+    counts = np.diff(np.r_[first_index, len(values)])
+    # Nearest-rank p95 per group via partial sort, which is much cheaper than np.percentile
+    p95s = np.empty(len(first_index), dtype=np.float64)
+    for i, group in enumerate(np.split(values, first_index[1:])):
+        rank = int(np.ceil(0.95 * len(group))) - 1
+        p95s[i] = np.partition(group, rank)[rank]
+    return {
+        "width": width,
+        "starts": bucket_starts[first_index],
+        "mins": np.minimum.reduceat(values, first_index),
+        "maxs": np.maximum.reduceat(values, first_index),
+        "sums": np.add.reduceat(values.astype(np.float64), first_index),
+        "counts": counts,
+        "p95_sums": p95s * counts,
+    }
+
+def resummarize(summary: dict, width: float) -> dict:
+    """Regroup a finer summary into coarser `width` buckets (tier widths must nest)"""
+    bucket_starts = np.floor(summary["starts"] / width) * width
+    first_index = np.flatnonzero(np.r_[True, bucket_starts[1:] != bucket_starts[:-1]])
+    return {
+        "width": width,
+        "starts": bucket_starts[first_index],
+        "mins": np.minimum.reduceat(summary["mins"], first_index),
+        "maxs": np.maximum.reduceat(summary["maxs"], first_index),
+        "sums": np.add.reduceat(summary["sums"], first_index),
+        "counts": np.add.reduceat(summary["counts"], first_index),
+        "p95_sums": np.add.reduceat(summary["p95_sums"], first_index),
+    }
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_duration(value: str) -> float:
+    """Parse "30s", "5m", "1h", "1d" or a plain number of seconds"""
+    value = value.strip()
+    if value and value[-1] in DURATION_UNITS:
+        return float(value[:-1]) * DURATION_UNITS[value[-1]]
+    return float(value)
+
+def parse_rollup_tiers(spec: str):
+    """Parse "1m:1440,1h:720,1d:365" into (name, width seconds, capacity) tuples"""
+    tiers = []
+    for item in spec.split(","):
+        name, capacity = item.strip().split(":")
+        tiers.append((name, parse_duration(name), int(capacity)))
+    tiers.sort(key=lambda tier: tier[1])
+    # Coarser tiers are folded from the finest tier's summary, so each width must divide the next
+    for (_, finer, _), (name, coarser, _) in zip(tiers, tiers[1:]):
+        if coarser % finer:
+            raise ValueError(f"Rollup tier {name} is not a multiple of the tier below it")
+    return tiers
+
+ROLLUP_TIERS = parse_rollup_tiers(settings.SENSOR_ROLLUP_TIERS)
+
+class SensorSeries:
+    """Raw samples of one parameter of one equipment, plus their rollup tiers"""
+
+    def __init__(self, equipment_id: str, sensor: dict, capacity: int):
+        self.equipment_id = equipment_id
+        self.parameter = sensor["parameter"]
+        self.sensor_type = sensor["type"]
+        self.sampling_rate = sensor.get("samplingRate", 1)
+        self.buffer = RingBuffer(capacity)
+        self.rollups = [RollupTier(name, width, size) for name, width, size in ROLLUP_TIERS]
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes + sum(tier.nbytes for tier in self.rollups)
+
+    def update_rollups(self, timestamps: np.ndarray, values: np.ndarray):
+        """Summarize once at the finest tier width, then fold into every tier"""
+        if not len(timestamps) or not self.rollups:
+            return
+        summary = summarize(timestamps, values, self.rollups[0].width)
+        for tier in self.rollups:
+            tier.fold(summary)
+
+    def append(self, timestamp: float, value: float):
+        if self.buffer.append(timestamp, value):
+            self.update_rollups(np.array([timestamp]), np.array([value], dtype=np.float32))
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray) -> int:
+        timestamps, values = self.buffer.extend(timestamps, values)
+        self.update_rollups(timestamps, values)
+        return len(timestamps)
+
+class SensorStore:
+    """Ring buffers per equipment and parameter, indexed by equipment_id"""
+
+    def __init__(self, retention_seconds: float, max_points: int):
+        self.retention_seconds = retention_seconds
+        self.max_points = max_points
+        self.series = {}
+
+    def capacity_for(self, sensor: dict) -> int:
+        """Slots needed to keep the retention window at the sensor's sampling rate, capped"""
+        rate = sensor.get("samplingRate", 1)
+        return max(1, min(self.max_points, int(rate * self.retention_seconds)))
+
+    def register_equipment(self, equipment: dict):
+        """Allocate buffers for every sensor of an equipment (idempotent)"""
+        sensors = self.series.setdefault(equipment["id"], {})
+        for sensor in equipment.get("sensors", []):
+            if sensor["parameter"] not in sensors:
+                sensors[sensor["parameter"]] = SensorSeries(equipment["id"], sensor, self.capacity_for(sensor))
+
+    def has_equipment(self, equipment_id: str) -> bool:
+        return equipment_id in self.series
+
+    def get_series(self, equipment_id: str, parameter: str):
+        return self.series.get(equipment_id, {}).get(parameter)
+
+    def append(self, equipment_id: str, parameter: str, timestamp: float, value: float):
+        """Append one sample; unknown equipment or parameters are ignored"""
+        series = self.get_series(equipment_id, parameter)
+        if series is not None:
+            series.append(timestamp, value)
+
+    def extend(self, equipment_id: str, parameter: str, timestamps: np.ndarray, values: np.ndarray) -> int:
+        """Append a batch of samples for one series"""
+        series = self.get_series(equipment_id, parameter)
+        if series is None:
+            return 0
+        return series.extend(timestamps, values)
+
+    def query(self, equipment_id: str, start: float = None, end: float = None, limit: int = None) -> dict:
+        """Samples per parameter of an equipment in [start, end]"""
+        return {
+            parameter: series.buffer.range(start, end, limit)
+            for parameter, series in self.series.get(equipment_id, {}).items()
+        }
+
+    def latest(self, equipment_id: str) -> dict:
+        """Latest (timestamp, value) per parameter of an equipment"""
+        return {
+            parameter: series.buffer.latest()
+            for parameter, series in self.series.get(equipment_id, {}).items()
+        }
+
+    def stats(self) -> dict:
+        """Series count and preallocated memory"""
+        all_series = [s for sensors in self.series.values() for s in sensors.values()]
+        return {
+            "equipment": len(self.series),
+            "series": len(all_series),
+            "samples": sum(s.buffer.size for s in all_series),
+            "bytes": sum(s.nbytes for s in all_series),
+        }
+
+sensor_store = SensorStore(settings.SENSOR_RETENTION_SECONDS, settings.SENSOR_MAX_POINTS_PER_SERIES)
@@ -0,0 +1,247 @@
+# State shared by gateway workers through one local-socket server: token buckets, counters and broadcast events
+import asyncio
+import itertools
+import json
+import os
+import signal
+import struct
+import time
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+from backend_python.api_gateway.app.services.rateLimiter import LocalBucketBackend
+
+logger = setup_logger("api_gateway_shared_state")
+
+FRAME_HEADER = struct.Struct("!I")
+
+def encode_frame(message) -> bytes:
+    body = json.dumps(message, separators=(",", ":")).encode()
+    return FRAME_HEADER.pack(len(body)) + body
+
+async def read_frame(reader: asyncio.StreamReader):
+    (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    return json.loads(await reader.readexactly(length))
+
+class SharedStateServer:
+    """Single owner of cross-worker state, run in its own process by the launcher
+
+    Requests are [id, op, args] frames answered with [id, result, error].
+    Published events are pushed to every other connection as [0, channel, message].
+    """
+
+    def __init__(self, path: str, max_keys: int):
+        self.path = path
+        self.buckets = LocalBucketBackend(max_keys)
+        self.counters = {}
+        self.writers = set()
+        self.requests = 0
+        self.events = 0
+
+    async def _execute(self, op: str, args: list, writer):
+        if op == "acquire":
+            return await self.buckets.acquire([tuple(bucket) for bucket in args[0]], time.time())
+        if op == "incr":
+            key, amount = args
+            self.counters[key] = self.counters.get(key, 0) + amount
+            return self.counters[key]
+        if op == "get":
+            return self.counters.get(args[0], 0)
+        if op == "publish":
+            channel, message = args
+            self.events += 1
+            event = encode_frame([0, channel, message])
+            for other in self.writers:
+                if other is not writer:
+                    other.write(event)
+            return None
+        if op == "stats":
+            return self.stats()
+        raise ValueError(f"Unknown operation: {op}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.writers.add(writer)
+        try:
+            while True:
+                request_id, op, args = await read_frame(reader)
+                self.requests += 1
+                try:
+                    writer.write(encode_frame([request_id, await self._execute(op, args, writer), None]))
+                except Exception as e:
+                    writer.write(encode_frame([request_id, None, str(e)]))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self.handle, path=self.path)
+        logger.info("Shared state server listening on %s", self.path)
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        """Process entry point; exits on SIGTERM and outlives Ctrl-C until the workers have drained"""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            asyncio.run(self.serve())
+        finally:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self.writers),
+            "requests": self.requests,
+            "events": self.events,
+            "counters": len(self.counters),
+            **self.buckets.stats(),
+        }
+
+class SharedStateClient:
+    """One worker's connection to the shared state server, reconnecting in the background
+
+    call() raises ConnectionError or asyncio.TimeoutError when the server is
+    unreachable or slow; callers decide whether to fail open.
+    """
+
+    def __init__(self, path: str, timeout: float):
+        self.path = path
+        self.timeout = timeout
+        self.writer = None
+        self.pending = {}
+        self.subscribers = {}
+        self.ids = itertools.count(1)
+        self._task = None
+        self.closed = False
+        self.errors = 0
+        self.reconnects = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def subscribe(self, channel: str, callback):
+        """Call callback(message) for events other workers publish on channel"""
+        self.subscribers.setdefault(channel, []).append(callback)
+
+    async def start(self):
+        self.closed = False
+        await self._connect()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _connect(self):
+        reader, self.writer = await asyncio.open_unix_connection(self.path)
+        self.reader = reader
+
+    async def _run(self):
+        """Read responses and events; reconnect with backoff when the connection drops"""
+        while not self.closed:
+            try:
+                if self.writer is None:
+                    await self._connect()
+                    self.reconnects += 1
+                    logger.info("Reconnected to shared state server")
+                while True:
+                    request_id, result, error = await read_frame(self.reader)
+                    if request_id == 0:
+                        self._dispatch(result, error)
+                        continue
+                    future = self.pending.pop(request_id, None)
+                    if future is not None and not future.done():
+                        if error is not None:
+                            future.set_exception(RuntimeError(error))
+                        else:
+                            future.set_result(result)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.IncompleteReadError) as e:
+                if not self.closed:
+                    logger.warning("Shared state connection lost: %s", e)
+                self._disconnect()
+                await asyncio.sleep(0.5)
+
+    def _dispatch(self, channel: str, message):
+        for callback in self.subscribers.get(channel, ()):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error("Shared state subscriber error on %s: %s", channel, e)
+
+    def _disconnect(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("shared state connection lost"))
+        self.pending.clear()
+
+    async def call(self, op: str, *args):
+        if self.writer is None:
+            raise ConnectionError("not connected to the shared state server")
+        request_id = next(self.ids)
+        future = self.pending[request_id] = asyncio.get_running_loop().create_future()
+        self.writer.write(encode_frame([request_id, op, list(args)]))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except Exception:
+            self.errors += 1
+            self.pending.pop(request_id, None)
+            raise
+
+    def publish(self, channel: str, message):
+        """Send an event to the other workers without waiting for the server"""
+        if self.writer is None:
+            self.errors += 1
+            return
+        self.writer.write(encode_frame([next(self.ids), "publish", [channel, message]]))
+
+    async def close(self):
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._disconnect()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "connected": self.writer is not None,
+            "pending": len(self.pending),
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+        }
+
+class SharedBucketBackend:
+    """Token buckets held by the shared state server, so limits apply across all workers"""
+
+    name = "shared"
+
+    def __init__(self, client: SharedStateClient):
+        self.client = client
+        self.errors = 0
+
+    async def acquire(self, buckets: list, now: float) -> float:
+        try:
+            return float(await self.client.call("acquire", buckets))
+        except Exception as e:
+            # Fail open, like the Redis backend
+            self.errors += 1
+            logger.error("Shared rate limit backend error: %s", e)
+            return 0.0
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"errors": self.errors}
+
+shared_state = SharedStateClient(settings.SHARED_STATE_SOCKET, settings.SHARED_STATE_TIMEOUT)
@@ -0,0 +1,44 @@
+# Request coalescing: identical in-flight reads share one upstream call
+import asyncio
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers with the same key await its result"""
+
+    def __init__(self):
+        self.in_flight = {}
+        self.calls = {}
+        self.executions = {}
+
+    async def do(self, key: tuple, fn, group: str = "default"):
+        """Return fn()'s result, joining an identical call already in flight"""
+        self.calls[group] = self.calls.get(group, 0) + 1
+        task = self.in_flight.get(key)
+        if task is None:
+            self.executions[group] = self.executions.get(group, 0) + 1
+            # Run in its own task so one caller's cancellation does not fail the others
+            task = asyncio.ensure_future(fn())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda finished: self._finished(key, finished))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: tuple, task: asyncio.Task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        """Calls, upstream executions and coalescing ratio per group"""
+        stats = {}
+        for group, calls in self.calls.items():
+            executions = self.executions.get(group, 0)
+            stats[group] = {
+                "calls": calls,
+                "executions": executions,
+                "coalesced": calls - executions,
+                "ratio": calls / executions if executions else 0.0,
+            }
+        return {"in_flight": len(self.in_flight), "groups": stats}
+
+single_flight = SingleFlight()
@@ -0,0 +1,119 @@
+# Publish/subscribe hub for live telemetry pushed over WebSocket and SSE
+import asyncio
+import json
+from collections import OrderedDict
+from datetime import datetime
+from backend_python.shared.config import settings
+from backend_python.shared.logger import setup_logger
+
+logger = setup_logger("api_gateway_telemetry")
+
+TOPICS = ("readings", "alerts", "predictions")
+ALL_EQUIPMENT = "*"
+
+class Subscription:
+    """One client's subscriptions and its bounded queue of pending messages
+
+    Pending messages are keyed by (topic, equipment_id): a newer update for the
+    same key replaces the one a slow client has not received yet, and when the
+    queue is full the oldest key is dropped.
+    """
+
+    def __init__(self, max_pending: int):
+        self.keys = set()
+        self.max_pending = max_pending
+        self.pending = OrderedDict()
+        self.event = asyncio.Event()
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def offer(self, key: tuple, message: tuple):
+        """Queue a pre-serialized message, coalescing with an undelivered one for the same key"""
+        if key in self.pending:
+            self.coalesced += 1
+            del self.pending[key]
+        elif len(self.pending) >= self.max_pending:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self.pending[key] = message
+        self.event.set()
+
+    async def next_batch(self, timeout: float = None) -> list:
+        """Wait for pending messages and take all of them; empty list on timeout"""
+        if not self.pending:
+            self.event.clear()
+            try:
+                await asyncio.wait_for(self.event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        batch = list(self.pending.values())
+        self.pending.clear()
+        self.delivered += len(batch)
+        return batch
+
+class TelemetryHub:
+    """Fans out each update once per topic to every subscribed client"""
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self.subscribers = {}
+        self.published = 0
+
+    def subscribe(self, subscription: Subscription, equipment_ids, topics):
+        """Add (topic, equipment) keys to a subscription; "*" subscribes to all equipment"""
+        for topic in topics:
+            if topic not in TOPICS:
+                raise ValueError(f"Unknown topic: {topic}")
+        for topic in topics:
+            for equipment_id in equipment_ids:
+                key = (topic, equipment_id)
+                subscription.keys.add(key)
+                self.subscribers.setdefault(key, set()).add(subscription)
+
+    def unsubscribe(self, subscription: Subscription, keys=None):
+        """Remove some or all keys of a subscription"""
+        for key in list(keys if keys is not None else subscription.keys):
+            subscription.keys.discard(key)
+            subscribers = self.subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[key]
+
+    def open(self) -> Subscription:
+        return Subscription(self.max_pending)
+
+    def has_subscribers(self, topic: str, equipment_id: str) -> bool:
+        """Cheap check so publishers can skip building payloads nobody listens to"""
+        return (topic, equipment_id) in self.subscribers or (topic, ALL_EQUIPMENT) in self.subscribers
+
+    def publish(self, topic: str, equipment_id: str, data):
+        """Serialize an update once and offer it to every matching subscriber"""
+        subscribers = self.subscribers.get((topic, equipment_id), set()) | self.subscribers.get((topic, ALL_EQUIPMENT), set())
+        if not subscribers:
+            return 0
+        text = json.dumps({
+            "topic": topic,
+            "equipmentId": equipment_id,
+            "data": data,
+            "timestamp": datetime.utcnow().isoformat()
+        }, default=str)
+        message = (topic, text)
+        for subscription in subscribers:
+            subscription.offer((topic, equipment_id), message)
+        self.published += 1
+        return len(subscribers)
+
+    def stats(self) -> dict:
+        clients = {s for subscribers in self.subscribers.values() for s in subscribers}
+        return {
+            "clients": len(clients),
+            "keys": len(self.subscribers),
+            "published": self.published,
+            "pending": sum(len(s.pending) for s in clients),
+            "coalesced": sum(s.coalesced for s in clients),
+            "dropped": sum(s.dropped for s in clients),
+        }
+
+telemetry_hub = TelemetryHub(settings.TELEMETRY_MAX_PENDING)
@@ -0,0 +1,51 @@
+# Stored benchmark baseline: save results and compare a new run against them
+import json
+import platform
+from datetime import datetime
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Metrics where a higher value is better; everything else compared is lower-is-better
+HIGHER_IS_BETTER = {"rps", "ops_per_sec"}
+COMPARED = {"rps", "p50_ms", "p95_ms", "p99_ms", "cpu_ms_per_request", "memory_hwm_mb", "ops_per_sec", "us_per_op"}
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+def save_baseline(section: str, results: dict, path: Path = BASELINE_PATH):
+    """Store results under a section ("load" or "micro"), keeping the other sections"""
+    baseline = load_baseline(path)
+    baseline[section] = {
+        "recorded": datetime.utcnow().isoformat(),
+        "machine": f"{platform.machine()} {platform.python_implementation()} {platform.python_version()}",
+        "results": results,
+    }
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+def compare(section: str, results: dict, tolerance: float, path: Path = BASELINE_PATH) -> list:
+    """Print a change table against the baseline and return the regressions beyond tolerance"""
+    stored = load_baseline(path).get(section, {}).get("results")
+    if not stored:
+        print(f"No '{section}' baseline at {path}; run with --save-baseline first")
+        return []
+
+    regressions = []
+    print(f"\n{'benchmark':<36} {'metric':<20} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, metrics in results.items():
+        if name not in stored:
+            print(f"{name:<36} {'(no baseline; re-run with --save-baseline)'}")
+            continue
+        for metric, value in metrics.items():
+            base = stored.get(name, {}).get(metric)
+            if metric not in COMPARED or not isinstance(value, (int, float)) or not base:
+                continue
+            change = (value - base) / base
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "  REGRESSION" if worse > tolerance else ""
+            print(f"{name:<36} {metric:<20} {base:>12.3f} {value:>12.3f} {change:>+7.1%}{flag}")
+            if flag:
+                regressions.append((name, metric, base, value))
+    return regressions
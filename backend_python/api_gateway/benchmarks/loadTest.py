@@ -0,0 +1,214 @@
+# Load test: main.app under uvicorn against stub upstreams, driven with realistic request mixes
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+import numpy as np
+from backend_python.api_gateway.benchmarks.baseline import compare, save_baseline
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+UPSTREAMS = ("SENSOR_SERVICE", "AI_SERVICE", "NOTIFICATION_SERVICE")
+UPLOAD_BODY = os.urandom(4096)
+
+# Scenario name -> list of (label, method, path template, body); {eq} is a random equipment ID
+SCENARIOS = {
+    "dashboard": [
+        ("dashboard_metrics", "GET", "/api/dashboard/metrics", None),
+        ("dashboard_stats", "GET", "/api/dashboard/stats", None),
+        ("alerts", "GET", "/api/alerts/{eq}", None),
+    ],
+    "sensors": [
+        ("sensor_latest", "GET", "/api/sensors/{eq}/data", None),
+        ("sensor_range_columnar", "GET", "/api/sensors/{eq}/data?from=0&format=columnar", None),
+        ("sensor_aggregate", "GET", "/api/sensors/{eq}/aggregate?bucket=10s&aggs=min,max,mean,p95", None),
+    ],
+    "proxy": [
+        ("proxy_upload", "POST", "/api/models/bench/upload", UPLOAD_BODY),
+        ("proxy_export", "GET", "/api/sensors/export?rows=50", None),
+        ("proxy_notifications", "GET", "/api/notifications?equipmentId={eq}", None),
+    ],
+    "predictions": [
+        ("predictions", "GET", "/api/predictions/{eq}", None),
+    ],
+    "health": [
+        ("health", "GET", "/health", None),
+        ("gateway_health", "GET", "/api/health", None),
+    ],
+}
+
+# Mix name -> scenario weights
+MIXES = {
+    "realistic": {"dashboard": 40, "sensors": 35, "proxy": 15, "health": 10},
+    "dashboard": {"dashboard": 100},
+    "sensors": {"sensors": 100},
+    "proxy": {"proxy": 100},
+    "predictions": {"predictions": 100},
+    "health": {"health": 100},
+}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def process_usage(pid: int) -> dict:
+    """CPU seconds and peak RSS of a process from /proc (Linux); empty elsewhere"""
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        cpu = (int(fields[11]) + int(fields[12])) / ticks
+        hwm = next(
+            int(line.split()[1]) for line in Path(f"/proc/{pid}/status").read_text().splitlines()
+            if line.startswith("VmHWM:")
+        )
+        return {"cpu_seconds": cpu, "memory_hwm_mb": hwm / 1024}
+    except (OSError, StopIteration, IndexError, ValueError):
+        return {}
+
+async def wait_until_up(url: str, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+def start_processes(args) -> tuple:
+    """Stub upstreams plus the gateway, wired together through the *_SERVICE_URL variables"""
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT), "RATE_LIMIT_ENABLED": str(args.rate_limit).lower(),
+           "PREDICTION_BACKEND": "upstream"}
+    processes = []
+    for name in UPSTREAMS:
+        port = free_port()
+        env[f"{name}_URL"] = f"http://127.0.0.1:{port}"
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "backend_python.api_gateway.benchmarks.stubUpstreams", "--name", name.lower(),
+             "--port", str(port), "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+             "--error-rate", str(args.error_rate)],
+            cwd=REPO_ROOT, env=env,
+        ))
+    gateway_port = free_port()
+    gateway = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend_python.api_gateway.app.main:app", "--host", "127.0.0.1",
+         "--port", str(gateway_port), "--log-level", "warning", "--no-access-log"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL,
+    )
+    processes.append(gateway)
+    upstream_urls = [env[f"{name}_URL"] for name in UPSTREAMS]
+    return f"http://127.0.0.1:{gateway_port}", gateway, processes, upstream_urls
+
+async def run_load(base_url: str, mix: dict, concurrency: int, duration: float, warmup: float, gateway_pid: int) -> tuple:
+    """Closed-loop workers; returns per-label latencies (ms), status counts, measured wall time and gateway usage"""
+    async with httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=concurrency), timeout=30) as client:
+        token = (await client.post("/login", json={"username": "admin", "password": "password"})).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        equipment = [eq["id"] for eq in (await client.get("/api/equipment")).json()["data"]]
+
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        latencies = {}
+        statuses = {}
+        measuring = False
+        stop_at = time.monotonic() + warmup + duration
+
+        async def worker():
+            while time.monotonic() < stop_at:
+                scenario = random.choices(names, weights)[0]
+                label, method, path, body = random.choice(SCENARIOS[scenario])
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path.format(eq=random.choice(equipment)), content=body)
+                    await response.aread()
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = "error"
+                if measuring:
+                    latencies.setdefault(label, []).append((time.perf_counter() - started) * 1000)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        await asyncio.sleep(warmup)
+        measuring = True
+        measured_from = time.perf_counter()
+        before = process_usage(gateway_pid)
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - measured_from
+        after = process_usage(gateway_pid)
+        usage = {}
+        if before and after:
+            usage = {"cpu_seconds": after["cpu_seconds"] - before["cpu_seconds"], "memory_hwm_mb": after["memory_hwm_mb"]}
+        return latencies, statuses, elapsed, usage
+
+def summarize(samples: list, elapsed: float) -> dict:
+    values = np.array(samples)
+    return {
+        "requests": len(values),
+        "rps": len(values) / elapsed,
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
+
+async def main(args):
+    base_url, gateway, processes, upstream_urls = start_processes(args)
+    try:
+        for url in upstream_urls + [base_url]:
+            await wait_until_up(f"{url}/health")
+        # Let the health prober see the upstreams before measuring
+        await asyncio.sleep(1.0)
+
+        latencies, statuses, elapsed, usage = await run_load(
+            base_url, MIXES[args.mix], args.concurrency, args.duration, args.warmup, gateway.pid
+        )
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    results = {name: summarize(samples, elapsed) for name, samples in sorted(latencies.items())}
+    overall = summarize([value for samples in latencies.values() for value in samples], elapsed)
+    if usage:
+        overall["cpu_ms_per_request"] = usage["cpu_seconds"] * 1000 / max(overall["requests"], 1)
+        overall["memory_hwm_mb"] = usage["memory_hwm_mb"]
+    results[f"total ({args.mix})"] = overall
+
+    print(f"\nmix={args.mix} concurrency={args.concurrency} duration={args.duration}s upstream latency={args.latency_ms}ms errors={args.error_rate:.0%}")
+    print(f"{'endpoint':<28} {'requests':>9} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, result in results.items():
+        print(f"{name:<28} {result['requests']:>9} {result['rps']:>9.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+    if "cpu_ms_per_request" in overall:
+        print(f"gateway CPU per request: {overall['cpu_ms_per_request']:.3f} ms, memory high-water mark: {overall['memory_hwm_mb']:.1f} MB")
+    print(f"status codes: {statuses}")
+
+    if args.save_baseline:
+        save_baseline("load", results)
+        print("Baseline saved")
+    if args.compare:
+        return 1 if compare("load", results, args.tolerance) else 0
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gateway load test against stub upstreams")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="realistic")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="added upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls failing with 503")
+    parser.add_argument("--rate-limit", action="store_true", help="keep gateway rate limiting enabled")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="compare with the stored baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    sys.exit(asyncio.run(main(parser.parse_args())))
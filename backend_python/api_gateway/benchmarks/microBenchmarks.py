@@ -0,0 +1,102 @@
+# Micro-benchmarks for gateway hot paths: token verification, payload building and response serialization
+import argparse
+import json
+import sys
+import time
+import timeit
+from fastapi.encoders import jsonable_encoder
+from backend_python.shared.auth import create_access_token, decode_token, verify_token, token_cache
+from backend_python.api_gateway.app.services.mockDataGenerator import MockDataGenerator
+from backend_python.api_gateway.app.services.sensorStore import SensorStore
+from backend_python.api_gateway.app.services.fleetAggregates import FleetAggregates
+from backend_python.api_gateway.app.services.responseEncoding import encode_json
+from backend_python.api_gateway.benchmarks.baseline import compare, save_baseline
+
+def measure(fn, min_time: float = 0.5) -> dict:
+    """Best-of-5 time per call, with the call count chosen so each repeat runs at least min_time / 5"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 5 / max(timer.timeit(number), 1e-9)))
+    best = min(timer.repeat(repeat=5, number=number)) / number
+    return {"us_per_op": best * 1e6, "ops_per_sec": 1 / best}
+
+def build_cases() -> dict:
+    """Benchmark name -> zero-argument callable"""
+    generator = MockDataGenerator()
+    equipment = generator.get_equipment_list()[0]
+    equipment_id = equipment["id"]
+    token = create_access_token({"sub": "bench", "role": "admin"})
+
+    # A store holding 10 minutes of 10 Hz samples for one elevator
+    store = SensorStore(600, 8192)
+    store.register_equipment(equipment)
+    now = time.time()
+    for sensor in equipment["sensors"]:
+        for second in range(600):
+            timestamps = [now - 600 + second + i / 10 for i in range(10)]
+            store.extend(equipment_id, sensor["parameter"], timestamps, generator.generate_sensor_values(sensor["parameter"], 10))
+    samples = store.query(equipment_id)
+    rows = [
+        generator.build_sensor_reading(equipment, sensor, float(ts), float(value))
+        for sensor in equipment["sensors"]
+        for ts, value in zip(*samples[sensor["parameter"]])
+    ]
+    columns = {
+        "equipmentId": equipment_id,
+        "sensors": [
+            {"parameter": parameter, "timestamps": (ts * 1000).astype("int64"), "values": values}
+            for parameter, (ts, values) in samples.items()
+        ],
+    }
+    # Fleet aggregates fed 30 days of hourly efficiency samples for 1000 elevators
+    aggregates = FleetAggregates(30)
+    for day in range(30):
+        for index in range(1000):
+            aggregates.set_status(f"ELV-{index}", "active" if index % 20 else "stopped", now - (30 - day) * 86400)
+            aggregates.record_efficiency(f"ELV-{index}", 90 + index % 8, now - (30 - day) * 86400)
+    dashboard = {**aggregates.stats(now), "trends": aggregates.trends()}
+
+    def verify_uncached():
+        token_cache.clear()
+        return verify_token(token)
+
+    return {
+        "verify_token (cached)": lambda: verify_token(token),
+        "verify_token (uncached)": verify_uncached,
+        "decode_token": lambda: decode_token(token),
+        "generate_sensor_data": lambda: generator.generate_sensor_data(equipment_id),
+        "build_sensor_reading": lambda: generator.build_sensor_reading(equipment, equipment["sensors"][0], now, 1.0),
+        "fleet stats": lambda: aggregates.stats(now),
+        "fleet stats + trends": lambda: (aggregates.stats(now), aggregates.trends()),
+        "fleet alert update": lambda: aggregates.set_alerts("ELV-1", ()),
+        "serialize dashboard (stdlib)": lambda: json.dumps(jsonable_encoder(dashboard)).encode(),
+        "serialize dashboard (encode_json)": lambda: encode_json(dashboard),
+        f"serialize {len(rows)} rows (stdlib)": lambda: json.dumps(jsonable_encoder(rows)).encode(),
+        f"serialize {len(rows)} rows (encode_json)": lambda: encode_json(rows),
+        f"serialize {len(rows)} columnar (encode_json)": lambda: encode_json(columns),
+    }
+
+def main(args) -> int:
+    results = {}
+    print(f"{'benchmark':<44} {'us/op':>12} {'ops/s':>14}")
+    for name, fn in build_cases().items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(fn, args.min_time)
+        print(f"{name:<44} {results[name]['us_per_op']:>12.2f} {results[name]['ops_per_sec']:>14.0f}")
+
+    if args.save_baseline:
+        save_baseline("micro", results)
+        print("Baseline saved")
+    if args.compare:
+        return 1 if compare("micro", results, args.tolerance) else 0
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gateway hot-path micro-benchmarks")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="compare with the stored baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,69 @@
+# Stand-in upstream services for benchmarks, with configurable latency and error rate
+import argparse
+import asyncio
+import random
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+
+def create_stub_app(name: str, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0) -> FastAPI:
+    """Upstream stub answering the paths the gateway proxies to"""
+    app = FastAPI(title=f"{name} stub")
+
+    async def simulate():
+        """Sleep for the configured latency; return an error response for a fraction of calls"""
+        delay = latency_ms + random.uniform(-jitter_ms, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if error_rate and random.random() < error_rate:
+            return Response(status_code=503, content=b'{"error":"injected failure"}', media_type="application/json")
+        return None
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "service": name}
+
+    @app.get("/api/sensors/export")
+    async def export(rows: int = 100):
+        failure = await simulate()
+        if failure is not None:
+            return failure
+
+        async def lines():
+            for i in range(rows):
+                yield f'{{"row":{i},"value":{random.random():.4f}}}\n'.encode()
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.post("/api/predictions/batch")
+    async def predict_batch(request: Request):
+        failure = await simulate()
+        if failure is not None:
+            return failure
+        items = (await request.json())["items"]
+        return {"results": [
+            {**item, "prediction": "normal", "confidence": round(random.uniform(0.7, 0.99), 2), "modelVersion": "1.0.0"}
+            for item in items
+        ]}
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+    async def echo(path: str, request: Request):
+        failure = await simulate()
+        if failure is not None:
+            return failure
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"service": name, "path": path, "method": request.method, "bytes": size}
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Run one upstream stub")
+    parser.add_argument("--name", default="stub")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = create_stub_app(args.name, args.latency_ms, args.jitter_ms, args.error_rate)
+    uvicorn.run(stub, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
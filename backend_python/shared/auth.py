@@ -1,9 +1,112 @@
 # Shared authentication utilities
 import jwt
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
 from backend_python.shared.config import settings
 
+class TokenCache:
+    """Bounded LRU cache of verified token payloads, keyed by token digest"""
+
+    def __init__(self, max_size: int, ttl: float, max_revoked: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_revoked = max_revoked
+        self._entries = OrderedDict()
+        self._revoked = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revocations = 0
+        self.revocation_evictions = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        """Cache key for a token; the raw token is never stored"""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, key: str):
+        """Cached payload for a digest, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: str, payload: dict):
+        """Cache a verified payload until the token's own exp (capped by the cache TTL)"""
+        expires_at = time.time() + self.ttl
+        if "exp" in payload:
+            expires_at = min(expires_at, float(payload["exp"]))
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revoke(self, key: str, expires_at: float):
+        """Evict a digest and refuse it until its exp, even though the signature still verifies"""
+        now = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._revoked[key] = expires_at
+            self._revoked.move_to_end(key)
+            self.revocations += 1
+            # Drop revocations for tokens that have expired anyway
+            for revoked_key in [k for k, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[revoked_key]
+            # Still over the bound: forget the oldest revocations first
+            while len(self._revoked) > self.max_revoked:
+                self._revoked.popitem(last=False)
+                self.revocation_evictions += 1
+
+    def is_revoked(self, key: str) -> bool:
+        """Whether a digest was revoked and has not expired yet"""
+        expires_at = self._revoked.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    def clear(self):
+        """Drop all cached payloads"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "revocations": self.revocations,
+            "revoked": len(self._revoked),
+            "max_revoked": self.max_revoked,
+            "revocation_evictions": self.revocation_evictions,
+        }
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL, settings.TOKEN_REVOKED_MAX)
+revocation_listeners = []
+
+def add_revocation_listener(callback):
+    """Call callback(digest, expires_at) whenever revoke_token revokes a token in this process"""
+    revocation_listeners.append(callback)
+
 def create_access_token(data: dict) -> str:
     """Generate JWT access token for authenticated users"""
     # Copy data and add expiration time
@@ -15,8 +118,8 @@ def create_access_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> dict:
-    """Verify and decode JWT token"""
+def decode_token(token: str) -> dict:
+    """Verify signature and claims of a JWT token (no caching)"""
     try:
         # Decode token and return payload
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
@@ -30,4 +133,30 @@ def verify_token(token: str) -> dict:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
-        )
\ No newline at end of file
+        )
+
+def verify_token(token: str) -> dict:
+    """Verify and decode JWT token, reusing the payload of a recently verified identical token"""
+    key = TokenCache.digest(token)
+    if token_cache.is_revoked(key):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = decode_token(token)
+        token_cache.put(key, payload)
+    return payload
+
+def revoke_token(token: str):
+    """Revoke a verified token so cached and future verifications reject it (401 if it does not verify)"""
+    payload = verify_token(token)
+    # Never keep a revocation longer than a token issued now could live
+    max_expires_at = time.time() + settings.JWT_EXPIRE_MINUTES * 60
+    expires_at = min(float(payload.get("exp", max_expires_at)), max_expires_at)
+    key = TokenCache.digest(token)
+    token_cache.revoke(key, expires_at)
+    for callback in revocation_listeners:
+        callback(key, expires_at)
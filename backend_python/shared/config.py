@@ -8,17 +8,124 @@ class Settings(BaseSettings):
     JWT_SECRET: str = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    TOKEN_CACHE_TTL: float = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+    TOKEN_REVOKED_MAX: int = int(os.getenv("TOKEN_REVOKED_MAX", "100000"))
     
     # Service URLs
     AI_SERVICE_URL: str = os.getenv("AI_SERVICE_URL", "http://ai_service:8001")
     NOTIFICATION_SERVICE_URL: str = os.getenv("NOTIFICATION_SERVICE_URL", "http://notification_service:8002")
     SENSOR_SERVICE_URL: str = os.getenv("SENSOR_SERVICE_URL", "http://sensor_service:8003")
     
+    # Upstream connection pools (defaults, overridable per service as <SERVICE>_<SETTING>)
+    UPSTREAM_MAX_CONNECTIONS: int = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+    UPSTREAM_MAX_KEEPALIVE: int = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+    UPSTREAM_KEEPALIVE_EXPIRY: float = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30.0"))
+    UPSTREAM_TIMEOUT: float = float(os.getenv("UPSTREAM_TIMEOUT", "30.0"))
+    UPSTREAM_CONNECT_TIMEOUT: float = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5.0"))
+    UPSTREAM_HTTP2: bool = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+    
+    # Upstream health probing
+    HEALTH_PROBE_INTERVAL: float = float(os.getenv("HEALTH_PROBE_INTERVAL", "5.0"))
+    HEALTH_CHECK_TIMEOUT: float = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2.0"))
+    HEALTH_CHECK_DEADLINE: float = float(os.getenv("HEALTH_CHECK_DEADLINE", "3.0"))
+    HEALTH_LATENCY_HISTORY: int = int(os.getenv("HEALTH_LATENCY_HISTORY", "20"))
+    HEALTH_FRESH_MIN_INTERVAL: float = float(os.getenv("HEALTH_FRESH_MIN_INTERVAL", "1.0"))
+    
+    # Circuit breakers, adaptive timeouts and bulkheads for upstream calls
+    BREAKER_WINDOW_SIZE: int = int(os.getenv("BREAKER_WINDOW_SIZE", "100"))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "20"))
+    BREAKER_ERROR_RATE: float = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+    BREAKER_LATENCY_P99: float = float(os.getenv("BREAKER_LATENCY_P99", "10.0"))
+    BREAKER_OPEN_SECONDS: float = float(os.getenv("BREAKER_OPEN_SECONDS", "30.0"))
+    BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("BREAKER_HALF_OPEN_CALLS", "5"))
+    ADAPTIVE_TIMEOUT_MULTIPLIER: float = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "3.0"))
+    ADAPTIVE_TIMEOUT_MIN: float = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "1.0"))
+    BULKHEAD_MAX_CONCURRENT: int = int(os.getenv("BULKHEAD_MAX_CONCURRENT", "50"))
+    BULKHEAD_MAX_WAIT: float = float(os.getenv("BULKHEAD_MAX_WAIT", "0.1"))
+    
+    # Sensor time-series store
+    SENSOR_UPDATE_INTERVAL: int = int(os.getenv("SENSOR_UPDATE_INTERVAL", "1000"))
+    SENSOR_RETENTION_SECONDS: float = float(os.getenv("SENSOR_RETENTION_SECONDS", "600"))
+    SENSOR_MAX_POINTS_PER_SERIES: int = int(os.getenv("SENSOR_MAX_POINTS_PER_SERIES", "4096"))
+    SENSOR_ROLLUP_TIERS: str = os.getenv("SENSOR_ROLLUP_TIERS", "1m:1440,1h:720,1d:365")
+    
+    # Sensor reading ingestion (write-behind to DATABASE_URL)
+    INGEST_QUEUE_MAX_READINGS: int = int(os.getenv("INGEST_QUEUE_MAX_READINGS", "1000000"))
+    INGEST_FLUSH_INTERVAL: float = float(os.getenv("INGEST_FLUSH_INTERVAL", "0.25"))
+    INGEST_MAX_BATCH: int = int(os.getenv("INGEST_MAX_BATCH", "100000"))
+    INGEST_MAX_BODY_BYTES: int = int(os.getenv("INGEST_MAX_BODY_BYTES", str(64 * 1024 * 1024)))
+    INGEST_MAX_AGE_SECONDS: float = float(os.getenv("INGEST_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+    INGEST_MAX_SKEW_SECONDS: float = float(os.getenv("INGEST_MAX_SKEW_SECONDS", "300"))
+    
+    # Dashboard aggregates (days of daily trend buckets kept)
+    DASHBOARD_TREND_DAYS: int = int(os.getenv("DASHBOARD_TREND_DAYS", "30"))
+    
+    # Live telemetry push (WebSocket/SSE)
+    TELEMETRY_MAX_PENDING: int = int(os.getenv("TELEMETRY_MAX_PENDING", "1000"))
+    TELEMETRY_HEARTBEAT: float = float(os.getenv("TELEMETRY_HEARTBEAT", "15.0"))
+    TELEMETRY_PREDICTION_INTERVAL: float = float(os.getenv("TELEMETRY_PREDICTION_INTERVAL", "30.0"))
+    
+    # Coalescing of identical in-flight upstream GETs: results are shared per "token" (default), per "user" (sub),
+    # or, as an explicit opt-in, across all users of a "role"
+    SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    SINGLE_FLIGHT_SCOPE: str = os.getenv("SINGLE_FLIGHT_SCOPE", "token")
+    
+    # Equipment registry
+    EQUIPMENT_PAGE_LIMIT: int = int(os.getenv("EQUIPMENT_PAGE_LIMIT", "100"))
+    EQUIPMENT_MAX_PAGE_LIMIT: int = int(os.getenv("EQUIPMENT_MAX_PAGE_LIMIT", "1000"))
+    EQUIPMENT_CHANGE_LOG_SIZE: int = int(os.getenv("EQUIPMENT_CHANGE_LOG_SIZE", "10000"))
+    
+    # Batch endpoints
+    BATCH_MAX_IDS: int = int(os.getenv("BATCH_MAX_IDS", "500"))
+    
+    # Response cache
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    
+    # Rate limiting (token buckets as "rate:burst" per second; route limits as "prefix=rate:burst,...")
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "local")
+    RATE_LIMIT_REDIS_URL: str = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_PER_IP: str = os.getenv("RATE_LIMIT_PER_IP", "100:200")
+    RATE_LIMIT_PER_USER: str = os.getenv("RATE_LIMIT_PER_USER", "50:100")
+    RATE_LIMIT_ROUTES: str = os.getenv("RATE_LIMIT_ROUTES", "/api/sensors/export=1:5,/api/models=1:5,/api/sensors/batch=5:20")
+    RATE_LIMIT_TRUST_FORWARDED: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    
+    # Admission control: shed load before it turns into a latency collapse
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "500"))
+    ADMISSION_MAX_LOOP_LAG: float = float(os.getenv("ADMISSION_MAX_LOOP_LAG", "0.2"))
+    ADMISSION_LAG_INTERVAL: float = float(os.getenv("ADMISSION_LAG_INTERVAL", "0.05"))
+    
+    # Prediction micro-batching ("mock" answers from generated data, "upstream" batches to AI_SERVICE)
+    PREDICTION_BACKEND: str = os.getenv("PREDICTION_BACKEND", "mock")
+    PREDICTION_BATCH_WINDOW_MS: float = float(os.getenv("PREDICTION_BATCH_WINDOW_MS", "5"))
+    PREDICTION_BATCH_MAX: int = int(os.getenv("PREDICTION_BATCH_MAX", "64"))
+    PREDICTION_CACHE_TTL: float = float(os.getenv("PREDICTION_CACHE_TTL", "10"))
+    PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", "50000"))
+    
+    # Production launcher (workers <= 0 means one per CPU) and cross-worker shared state
+    GATEWAY_HOST: str = os.getenv("GATEWAY_HOST", "0.0.0.0")
+    GATEWAY_PORT: int = int(os.getenv("GATEWAY_PORT", "8000"))
+    GATEWAY_WORKERS: int = int(os.getenv("GATEWAY_WORKERS", "1"))
+    GATEWAY_REUSE_PORT: bool = os.getenv("GATEWAY_REUSE_PORT", "false").lower() == "true"
+    GATEWAY_DRAIN_TIMEOUT: float = float(os.getenv("GATEWAY_DRAIN_TIMEOUT", "15"))
+    SHARED_STATE_SOCKET: str = os.getenv("SHARED_STATE_SOCKET", "")
+    SHARED_STATE_TIMEOUT: float = float(os.getenv("SHARED_STATE_TIMEOUT", "0.1"))
+    
+    # AI provider advertised to clients
+    AI_PROVIDER: str = os.getenv("AI_PROVIDER", "openai")
+    
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./microservices.db")
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Fraction of requests whose info/debug lines are kept, by route prefix ("prefix=rate,...")
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "/health=0.01,/api/health=0.01,/api/dashboard=0.1,/api/sensors=0.1")
     
     class Config:
         env_file = ".env"
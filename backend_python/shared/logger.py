@@ -1,24 +1,188 @@
 # Centralized logging configuration for all microservices
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
 import sys
+import threading
+import zlib
+from contextvars import ContextVar
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from backend_python.shared.config import settings
 
+# Request correlation, set per request by RequestContextMiddleware and read when a record is logged
+request_id_var = ContextVar("request_id", default=None)
+route_var = ContextVar("route", default=None)
+
+def parse_sample_rates(value: str) -> list:
+    """Parse "prefix=rate,..." into (prefix, rate) pairs, longest prefix first"""
+    rates = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        prefix, _, rate = item.strip().partition("=")
+        rates.append((prefix, float(rate)))
+    return sorted(rates, key=lambda rate: len(rate[0]), reverse=True)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+            "service": record.name,
+            "message": record.getMessage(),
+        }
+        if record.request_id:
+            entry["requestId"] = record.request_id
+        if record.route:
+            entry["route"] = record.route
+        if record.exc_info:
+            record.exc_text = record.exc_text or self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """The original human-readable line, with the request ID when there is one"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        return f"{line} [{record.request_id}]" if record.request_id else line
+
+_exception_formatter = logging.Formatter()
+
+class SamplingQueueHandler(QueueHandler):
+    """Non-blocking hand-off to the writer thread
+
+    Info/debug records on sampled routes are kept for a deterministic fraction
+    of requests (all lines of a request are kept or dropped together). When the
+    queue is full records are dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue, sample_rates: list):
+        super().__init__(log_queue)
+        self.sample_rates = sample_rates
+        self.dropped = {}
+        self.sampled_out = 0
+        self._lock = threading.Lock()
+
+    def keep(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not record.route:
+            return True
+        for prefix, rate in self.sample_rates:
+            if record.route.startswith(prefix):
+                if record.request_id:
+                    return zlib.crc32(record.request_id.encode()) % 10000 < rate * 10000
+                return random.random() < rate
+        return True
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args and format the traceback now, like QueueHandler, so the writer only serializes
+
+        Args may be mutated after the call returns and exc_info (with its frames)
+        belongs to this thread, so neither crosses the queue; the JSON and text
+        layouts are still applied by the writer.
+        """
+        message = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = _exception_formatter.formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.msg = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        return record
+
+    def emit(self, record: logging.LogRecord):
+        if _listener is None:
+            _start_writer()
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        if not self.keep(record):
+            with self._lock:
+                self.sampled_out += 1
+            return
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            with self._lock:
+                self.dropped[record.levelname] = self.dropped.get(record.levelname, 0) + 1
+
+_pipeline_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+
+def _pipeline() -> SamplingQueueHandler:
+    """Process-wide queue handler; its background writer starts with the first record"""
+    global _queue_handler
+    with _pipeline_lock:
+        if _queue_handler is None:
+            log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+            _queue_handler = SamplingQueueHandler(log_queue, parse_sample_rates(settings.LOG_SAMPLE_RATES))
+        return _queue_handler
+
+def _start_writer():
+    """Start the thread writing queued records (lazily, so importing never starts a thread)"""
+    global _listener
+    with _pipeline_lock:
+        if _listener is None:
+            writer = logging.StreamHandler(sys.stdout)
+            writer.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+            _listener = QueueListener(_queue_handler.queue, writer, respect_handler_level=False)
+            _listener.start()
+
+def shutdown_logging():
+    """Write out what is still queued and stop the writer thread"""
+    global _listener
+    with _pipeline_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+# Flush what is still queued when the process exits
+atexit.register(shutdown_logging)
+
+def _reset_after_fork():
+    """A forked worker gets a fresh queue and starts its own writer; the parent's thread does not survive fork"""
+    global _pipeline_lock, _listener
+    _pipeline_lock = threading.Lock()
+    _listener = None
+    if _queue_handler is not None:
+        _queue_handler.queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        _queue_handler._lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def log_stats() -> dict:
+    """Queue depth and records dropped by overflow or sampling"""
+    handler = _pipeline()
+    return {
+        "queued": handler.queue.qsize(),
+        "capacity": handler.queue.maxsize,
+        "dropped": dict(handler.dropped),
+        "sampled_out": handler.sampled_out,
+    }
+
 def setup_logger(service_name: str) -> logging.Logger:
     """Configure structured logging for microservices"""
     # Create logger with service name
     logger = logging.getLogger(service_name)
     logger.setLevel(getattr(logging, settings.LOG_LEVEL))
-    
-    # Create console handler with formatting
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter(
-        f'%(asctime)s - {service_name} - %(levelname)s - %(message)s'
-    )
-    handler.setFormatter(formatter)
-    
-    # Add handler to logger
+
+    # All loggers share one queue; records are written by a background thread
     if not logger.handlers:
-        logger.addHandler(handler)
-    
-    return logger
\ No newline at end of file
+        logger.addHandler(_pipeline())
+
+    return logger
@@ -0,0 +1,50 @@
+# Request-ID correlation middleware shared by all services
+import re
+import uuid
+from backend_python.shared.logger import request_id_var, route_var
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Client-supplied IDs end up in log lines and upstream headers, so only short plain tokens are kept
+VALID_REQUEST_ID = re.compile(rb"[A-Za-z0-9._:-]{1,128}")
+
+class RequestContextMiddleware:
+    """Binds a request ID and route to the logging context for the duration of each request
+
+    The ID is taken from X-Request-ID when it is a short token of letters,
+    digits and ._:- (otherwise a new one is generated), set on the request
+    headers so proxied upstream calls carry it, and echoed on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                if VALID_REQUEST_ID.fullmatch(value):
+                    request_id = value.decode("ascii")
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+            scope["headers"] = [
+                (name, value) for name, value in scope["headers"] if name != REQUEST_ID_HEADER
+            ] + [(REQUEST_ID_HEADER, request_id.encode())]
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(REQUEST_ID_HEADER, request_id.encode())]
+            await send(message)
+
+        request_token = request_id_var.set(request_id)
+        route_token = route_var.set(scope["path"])
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(request_token)
+            route_var.reset(route_token)